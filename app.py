@@ -4,21 +4,30 @@ app.py: Flask application to control the flow of the front end.
 import os
 import logging
 import hashlib
+import hmac
+import glob
 import json
+import re
 import threading
 import time
 import pytz
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone, date
 from services.meal_api_client import MealPlanningAPI, MealPlanningAPIError
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, flash, make_response
-from functools import wraps
+from flask import Flask, Response, render_template, request, redirect, url_for, session, jsonify, flash, make_response, g
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.datastructures import Headers
+from functools import wraps, lru_cache, cache
+import orjson
 
 # PostgreSQL imports
 from database import get_db, close_db, init_db, get_engine
+from lru import LRUCache
 from sqlalchemy import text
 from dotenv import load_dotenv
 from decimal import Decimal
+from types import SimpleNamespace
 import requests
 
 # Load environment variables FIRST
@@ -31,28 +40,223 @@ app.config.setdefault('MEAL_API_AVAILABLE', True)
 
 # ====================Security fix to clean cache between sessions ====
 
+_NO_CACHE_HEADERS = {
+    'Cache-Control': 'no-store, no-cache, must-revalidate, post-check=0, pre-check=0, max-age=0',
+    'Pragma': 'no-cache',
+    'Expires': '-1'
+}
+
 def no_cache(view):
     """Decorator to add no-cache headers to prevent browser caching of sensitive pages"""
     @wraps(view)
     def no_cache_view(*args, **kwargs):
-        response = make_response(view(*args, **kwargs))
-        response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, post-check=0, pre-check=0, max-age=0'
-        response.headers['Pragma'] = 'no-cache'
-        response.headers['Expires'] = '-1'
+        rv = view(*args, **kwargs)
+        # redirect() already hands back a Response; only wrap rendered strings/tuples
+        response = rv if isinstance(rv, Response) else make_response(rv)
+        response.headers.update(_NO_CACHE_HEADERS)
         return response
     return no_cache_view
 
 # ====================HELPER TO HANDLE SERIAL DECIMALS IN POSTGRES ====
 
-class DecimalEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, Decimal):
-            return float(obj)
-        return super(DecimalEncoder, self).default(obj)
+def orjson_default(obj):
+    """Serialize types orjson does not handle natively (Postgres NUMERIC comes back as Decimal)"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson, used by jsonify and the tojson filter"""
+    # Meal plans are keyed by day number, so allow non-string keys
+    option = orjson.OPT_NON_STR_KEYS
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=orjson_default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        # Flask's session serializer passes object_hook to untag tuples (e.g. flashed messages);
+        # orjson has no hooks, so those calls go through the stdlib decoder
+        if kwargs:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+# Must be set before the first template filter is registered, which creates the Jinja env.
+# Plan persistence also serializes through app.json.dumps so stored JSON matches what jsonify emits.
+app.json = OrjsonProvider(app)
+
+# ==================== SQL STATEMENTS ====================
+# Compiled once at import; routes pass these to db.execute() instead of building text() per request
+
+# Transactions
+# For writes the user can simply redo (plan generation): the commit returns
+# without waiting for the WAL flush, so a crash can lose at most the last few hundred ms of
+# such writes, never corrupt them. Lasts only for the current transaction.
+SQL_ASYNC_COMMIT = text("SET LOCAL synchronous_commit TO OFF")
+
+# Users
+# Column projections for hot routes that only read a handful of user fields,
+# so the wide JSON/text profile columns are not shipped over the wire for nothing
+USER_COLS_PLAN_VIEW = "id, timezone"
+USER_COLS_MEAL_GEN = (
+    "id, caloric_target, protein_target_g, carbs_target_g, fat_target_g, "
+    "dietary_restrictions, food_preferences, food_exclusions"
+)
+USER_COLS_FOOD_PREFERENCES = "id, food_preferences, food_exclusions"
+USER_COLS_BASIC_INFO = "id, gender, age, height, weight"
+# Everything the single-field questionnaire pages pre-fill, shared so a user moving
+# through the steps hits one statement shape
+USER_COLS_QUESTIONNAIRE = (
+    "id, activity_level, fitness_goals, available_equipment, workout_schedule, "
+    "physical_limitations, dietary_restrictions"
+)
+USER_COLS_PROFILE_SUMMARY = (
+    "id, name, gender, age, height, weight, activity_level, fitness_goals, available_equipment, "
+    "workout_schedule, physical_limitations, dietary_restrictions, food_preferences, food_exclusions, "
+    "privacy_accepted"
+)
+SQL_USER_PLAN_VIEW = text(f"SELECT {USER_COLS_PLAN_VIEW} FROM users WHERE id = :id")
+SQL_USER_MEAL_GEN = text(f"SELECT {USER_COLS_MEAL_GEN} FROM users WHERE id = :id")
+SQL_USER_FOOD_PREFERENCES = text(f"SELECT {USER_COLS_FOOD_PREFERENCES} FROM users WHERE id = :id")
+SQL_USER_BASIC_INFO = text(f"SELECT {USER_COLS_BASIC_INFO} FROM users WHERE id = :id")
+SQL_USER_QUESTIONNAIRE = text(f"SELECT {USER_COLS_QUESTIONNAIRE} FROM users WHERE id = :id")
+SQL_USER_PROFILE_SUMMARY = text(f"SELECT {USER_COLS_PROFILE_SUMMARY} FROM users WHERE id = :id")
+SQL_USER_CREDENTIALS = text("SELECT id, name, password FROM users WHERE email = :email")
+SQL_INSERT_USER = text("INSERT INTO users (name, email, password) VALUES (:name, :email, :password) RETURNING id, name")
+SQL_UPDATE_PASSWORD = text("UPDATE users SET password = :password WHERE id = :id")
+SQL_UPDATE_NUTRITION_TARGETS = text("""
+    UPDATE users 
+    SET bmr = :bmr, tdee = :tdee, caloric_target = :caloric_target,
+        protein_target_g = :protein_g, carbs_target_g = :carbs_g, fat_target_g = :fat_g
+    WHERE id = :id
+""")
+
+# Profile steps (the first three return what recalculate_nutrition_targets needs)
+_NUTRITION_INPUT_COLUMNS = "id, age, gender, height, weight, activity_level, fitness_goals"
+SQL_UPDATE_BASIC_INFO = text(
+    "UPDATE users SET gender = :gender, age = :age, height = :height, weight = :weight "
+    f"WHERE id = :id RETURNING {_NUTRITION_INPUT_COLUMNS}"
+)
+SQL_UPDATE_ACTIVITY_LEVEL = text(
+    f"UPDATE users SET activity_level = :activity WHERE id = :id RETURNING {_NUTRITION_INPUT_COLUMNS}"
+)
+SQL_UPDATE_FITNESS_GOALS = text(
+    f"UPDATE users SET fitness_goals = :goals WHERE id = :id RETURNING {_NUTRITION_INPUT_COLUMNS}"
+)
+SQL_UPDATE_EQUIPMENT = text("UPDATE users SET available_equipment = :equipment WHERE id = :id")
+SQL_UPDATE_WORKOUT_SCHEDULE = text("UPDATE users SET workout_schedule = :schedule WHERE id = :id")
+SQL_UPDATE_PHYSICAL_LIMITATIONS = text("UPDATE users SET physical_limitations = :limitations WHERE id = :id")
+SQL_UPDATE_DIETARY_RESTRICTIONS = text("UPDATE users SET dietary_restrictions = :restrictions WHERE id = :id")
+SQL_UPDATE_FOOD_PREFERENCES = text(
+    "UPDATE users SET food_preferences = :preferences, food_exclusions = :exclusions WHERE id = :user_id"
+)
+SQL_ACCEPT_PRIVACY = text(f"""
+    UPDATE users 
+    SET privacy_accepted = TRUE, privacy_accepted_at = :timestamp, timezone = :tz 
+    WHERE id = :user_id
+    RETURNING {USER_COLS_MEAL_GEN}
+""")
+
+# Plans
+# Workout, meal and grocery upserts for one start date, chained as data-modifying CTEs
+# so create_plan saves all three in a single round trip. Returns the same id/version
+# columns as SQL_DASHBOARD so the saved plans can seed the dashboard cache.
+SQL_UPSERT_PLANS = text("""
+    WITH workout AS (
+        INSERT INTO workout_plans (user_id, start_date, plan_data)
+        VALUES (:user_id, :start_date, :workout_data)
+        ON CONFLICT (user_id, start_date) 
+        DO UPDATE SET plan_data = EXCLUDED.plan_data, updated_at = CURRENT_TIMESTAMP
+        RETURNING id, GREATEST(created_at, updated_at) AS version
+    ),
+    meal AS (
+        INSERT INTO meal_plans (user_id, start_date, plan_data)
+        VALUES (:user_id, :start_date, :meal_data)
+        ON CONFLICT (user_id, start_date) 
+        DO UPDATE SET plan_data = EXCLUDED.plan_data, updated_at = CURRENT_TIMESTAMP
+        RETURNING id, GREATEST(created_at, updated_at) AS version
+    ),
+    grocery AS (
+        INSERT INTO grocery_lists (user_id, start_date, grocery_data)
+        VALUES (:user_id, :start_date, :grocery_data)
+        ON CONFLICT (user_id, start_date) 
+        DO UPDATE SET grocery_data = EXCLUDED.grocery_data, updated_at = CURRENT_TIMESTAMP
+        RETURNING id, GREATEST(created_at, updated_at) AS version
+    )
+    SELECT workout.id AS workout_id, workout.version AS workout_version,
+           meal.id AS meal_id, meal.version AS meal_version,
+           grocery.id AS grocery_id, grocery.version AS grocery_version
+    FROM workout, meal, grocery
+""")
+# Everything the dashboard needs in one round trip: the user's targets plus the id and version of
+# the latest workout, meal and grocery rows, each found by a LATERAL top-1 on its user/created_at
+# index. The blobs themselves are only read (by SQL_DASHBOARD_PLANS) when the parsed copies are not cached.
+SQL_DASHBOARD = text("""
+    SELECT u.id, u.timezone, u.caloric_target, u.protein_target_g, u.carbs_target_g, u.fat_target_g,
+           u.protein_pct, u.carbs_pct, u.fat_pct,
+           wp.id AS workout_id, wp.version AS workout_version,
+           mp.id AS meal_id, mp.version AS meal_version, mp.start_date AS meal_start_date,
+           gl.id AS grocery_id, gl.version AS grocery_version
+    FROM users u
+    LEFT JOIN LATERAL (
+        SELECT id, GREATEST(created_at, updated_at) AS version
+        FROM workout_plans WHERE user_id = u.id ORDER BY created_at DESC LIMIT 1
+    ) wp ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT id, GREATEST(created_at, updated_at) AS version, start_date
+        FROM meal_plans WHERE user_id = u.id ORDER BY created_at DESC LIMIT 1
+    ) mp ON TRUE
+    LEFT JOIN LATERAL (
+        SELECT id, GREATEST(created_at, updated_at) AS version
+        FROM grocery_lists WHERE user_id = u.id ORDER BY created_at DESC LIMIT 1
+    ) gl ON TRUE
+    WHERE u.id = :id
+""")
+SQL_DASHBOARD_PLANS = text("""
+    SELECT (SELECT plan_data FROM workout_plans WHERE id = :workout_id) AS workout_data,
+           (SELECT plan_data FROM meal_plans WHERE id = :meal_id) AS meal_data,
+           (SELECT grocery_data FROM grocery_lists WHERE id = :grocery_id) AS grocery_data
+""")
+SQL_LATEST_GROCERY_LIST = text(
+    "SELECT id, grocery_data, created_at, updated_at FROM grocery_lists "
+    "WHERE user_id = :id ORDER BY created_at DESC LIMIT 1"
+)
+# Plan pages read the blob plus what the ETag and the meal view cache key on
+PLAN_COLS_PAGE = "id, start_date, plan_data, created_at, updated_at"
+SQL_ACTIVE_WORKOUT_PLAN = text(f"""
+    SELECT {PLAN_COLS_PAGE} FROM workout_plans 
+    WHERE user_id = :id AND CAST(start_date AS DATE) <= :today 
+    ORDER BY start_date DESC, created_at DESC 
+    LIMIT 1
+""")
+SQL_ACTIVE_MEAL_PLAN = text(f"""
+    SELECT {PLAN_COLS_PAGE} FROM meal_plans 
+    WHERE user_id = :id AND CAST(start_date AS DATE) <= :today 
+    ORDER BY start_date DESC, created_at DESC 
+    LIMIT 1
+""")
+# Regenerating a week bumps created_at so the "latest plan" queries pick it up
+SQL_UPSERT_WORKOUT_PLAN = text("""
+    INSERT INTO workout_plans (user_id, start_date, plan_data)
+    VALUES (:user_id, :start_date, :plan_data)
+    ON CONFLICT (user_id, start_date) 
+    DO UPDATE SET plan_data = EXCLUDED.plan_data, created_at = CURRENT_TIMESTAMP
+""")
+# Bumps updated_at so the dashboard's cached copy of the list is replaced
+SQL_UPDATE_GROCERY_DATA = text(
+    "UPDATE grocery_lists SET grocery_data = :grocery_data, updated_at = CURRENT_TIMESTAMP WHERE id = :id"
+)
 
 # ====================INITIALIZE WORKOUT GENERATOR ====================
 from workout_generator import WorkoutGenerator
 
+@cache
+def get_workout_generator():
+    """Build the shared WorkoutGenerator on first use instead of once per request"""
+    return WorkoutGenerator(exercise_db='exercises.db')
+
+# create_plan runs the workout generator here while the request thread waits on the meal API
+_workout_plan_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="WorkoutPlan")
+
 # ==================== METABOLIC CALCULATION FUNCTIONS ====================
 def inches_to_cm(inches):
     """Convert inches to centimeters"""
@@ -68,15 +272,15 @@ def inches_to_feet_inches(total_inches):
     inches = int(total_inches % 12)
     return feet, inches
 
-def calculate_bmr(user):
+def calculate_bmr(age, height, weight, gender):
     """Calculate Basal Metabolic Rate using Mifflin-St Jeor equation"""
-    age = int(user['age'])
+    age = int(age)
     
     # Convert from stored imperial to metric for calculation
-    height_cm = inches_to_cm(float(user['height']))  # height stored as inches
-    weight_kg = lbs_to_kg(float(user['weight']))     # weight stored as lbs
+    height_cm = inches_to_cm(float(height))  # height stored as inches
+    weight_kg = lbs_to_kg(float(weight))     # weight stored as lbs
     
-    gender = user['gender'].lower()
+    gender = gender.lower()
     
     if gender == 'male':
         bmr = (10 * weight_kg) + (6.25 * height_cm) - (5 * age) + 5
@@ -85,27 +289,37 @@ def calculate_bmr(user):
     
     return round(bmr, 2)
 
+# Lookup tables for the nutrition chain, built once at import rather than on every call
+ACTIVITY_MULTIPLIERS = {
+    'sedentary': 1.2,
+    'lightly_active': 1.375,
+    'moderately_active': 1.55,
+    'very_active': 1.725,
+    'extra_active': 1.9
+}
+
+CALORIC_ADJUSTMENTS = {
+    'weight_loss': -500,
+    'muscle_gain': 400,
+    'maintenance': 0,
+    'general_fitness': -250
+}
+
+MACRO_RATIOS = {
+    'weight_loss': {'protein': 0.40, 'carbs': 0.30, 'fat': 0.30},
+    'muscle_gain': {'protein': 0.30, 'carbs': 0.40, 'fat': 0.30},
+    'maintenance': {'protein': 0.25, 'carbs': 0.45, 'fat': 0.30},
+    'general_fitness': {'protein': 0.30, 'carbs': 0.40, 'fat': 0.30}
+}
+
 def calculate_tdee(bmr, activity_level):
     """Calculate Total Daily Energy Expenditure"""
-    activity_multipliers = {
-        'sedentary': 1.2,
-        'lightly_active': 1.375,
-        'moderately_active': 1.55,
-        'very_active': 1.725,
-        'extra_active': 1.9
-    }
-    multiplier = activity_multipliers.get(activity_level, 1.2)
+    multiplier = ACTIVITY_MULTIPLIERS.get(activity_level, 1.2)
     return round(bmr * multiplier, 2)
 
 def calculate_caloric_target(tdee, fitness_goal):
     """Calculate daily caloric target based on fitness goal"""
-    adjustments = {
-        'weight_loss': -500,
-        'muscle_gain': 400,
-        'maintenance': 0,
-        'general_fitness': -250
-    }
-    adjustment = adjustments.get(fitness_goal, 0)
+    adjustment = CALORIC_ADJUSTMENTS.get(fitness_goal, 0)
     return round(tdee + adjustment, 2)
 
 def calculate_weekly_exercise_calories(workout_plan, weight_kg):
@@ -130,14 +344,7 @@ def calculate_weekly_exercise_calories(workout_plan, weight_kg):
 
 def calculate_macros(caloric_target, fitness_goal):
     """Calculate macro targets based on fitness goal (percentage method)"""
-    macro_ratios = {
-        'weight_loss': {'protein': 0.40, 'carbs': 0.30, 'fat': 0.30},
-        'muscle_gain': {'protein': 0.30, 'carbs': 0.40, 'fat': 0.30},
-        'maintenance': {'protein': 0.25, 'carbs': 0.45, 'fat': 0.30},
-        'general_fitness': {'protein': 0.30, 'carbs': 0.40, 'fat': 0.30}
-    }
-    
-    ratios = macro_ratios.get(fitness_goal, macro_ratios['maintenance'])
+    ratios = MACRO_RATIOS.get(fitness_goal, MACRO_RATIOS['maintenance'])
     
     # Calculate grams (protein: 4 cal/g, carbs: 4 cal/g, fat: 9 cal/g)
     protein_g = round((caloric_target * ratios['protein']) / 4, 1)
@@ -153,6 +360,32 @@ def calculate_macros(caloric_target, fitness_goal):
         'fat_pct': int(ratios['fat'] * 100)
     }
 
+def calculate_nutrition_targets(user):
+    """
+    Run the whole BMR -> TDEE -> caloric target -> macros chain in one call
+    
+    Args:
+        user: Row with age, gender, height, weight, activity_level and fitness_goals
+    
+    Returns:
+        tuple: (bmr, tdee, caloric_target, macros); macros is shared, treat as read-only
+    """
+    return _nutrition_targets(user.age, user.height, user.weight, user.gender,
+                              user.activity_level, user.fitness_goals)
+
+# Pure function of six small profile values, and each onboarding step changes only one of them,
+# so repeated inputs (re-saved steps, common profiles) skip the arithmetic entirely
+@lru_cache(maxsize=4096)
+def _nutrition_targets(age, height, weight, gender, activity_level, fitness_goal):
+    bmr = calculate_bmr(age, height, weight, gender)
+    # TDEE and caloric target fall back to the previous stage when the input is not set yet
+    tdee = calculate_tdee(bmr, activity_level) if activity_level else bmr
+    if not fitness_goal:
+        return bmr, tdee, tdee, {'protein_g': 0, 'carbs_g': 0, 'fat_g': 0}
+    
+    caloric_target = calculate_caloric_target(tdee, fitness_goal)
+    return bmr, tdee, caloric_target, calculate_macros(caloric_target, fitness_goal)
+
 # def get_monday_of_week(date=None):
 #     """Get the Monday of the week for a given date (or today)"""
 #     if date is None:
@@ -178,22 +411,23 @@ def get_user_current_date(user_timezone_str):
     except pytz.UnknownTimeZoneError:
         return datetime.now(pytz.utc).date()
 
-def get_current_plan_day(start_date_str, user_timezone_str):
+def get_current_plan_day(start_date, user_today):
     """
     Calculates which day of the plan (1-7) the user is currently on.
     Returns: Integer (1-7). If plan is expired (>7), returns 8.
+    
+    Args:
+        start_date: Plan start date from the DB (a 'YYYY-MM-DD' string is also accepted)
+        user_today: The user's current date, as already read by the route via get_user_current_date
     """
-    user_today = get_user_current_date(user_timezone_str)
+    if isinstance(start_date, str):
+        try:
+            start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+        except ValueError:
+            return 1 # Fallback
     
-    # Parse the start date from DB string (e.g., '2023-11-26')
-    try:
-        start_date = datetime.strptime(start_date_str, '%Y-%m-%d').date()
-    except ValueError:
-        return 1 # Fallback
-        
-    delta = (user_today - start_date).days
-      
-    return delta + 1
+    # Ordinal arithmetic skips building a timedelta just to read .days
+    return user_today.toordinal() - start_date.toordinal() + 1
 
 def get_day_number(date=None):
     """Get the day number (1-7) where Monday=1, Sunday=7"""
@@ -223,95 +457,71 @@ def rotate_workout_plan_to_start_date(workout_data, start_date_obj):
     # Get the weekday (0=Monday, 6=Sunday)
     weekday_offset = start_date_obj.weekday()
     
-    # If starting on Monday, no rotation needed
-    if weekday_offset == 0:
-        # Still need to update day labels with dates
-        for i, day in enumerate(workout_data['days']):
-            day_date = start_date_obj + timedelta(days=i)
-            day['day'] = day_date.strftime('%A, %B %d')
-        return workout_data
-    
-    # Rotate the days list using deque
-    days_deque = deque(workout_data['days'])
-    days_deque.rotate(-weekday_offset)  # Rotate LEFT to shift start day
-    workout_data['days'] = list(days_deque)
+    # If starting on Monday, no rotation needed (day labels are still updated below)
+    if weekday_offset != 0:
+        # Rotate the days list using deque
+        days_deque = deque(workout_data['days'])
+        days_deque.rotate(-weekday_offset)  # Rotate LEFT to shift start day
+        workout_data['days'] = list(days_deque)
     
     # Update day labels to show actual dates instead of weekday names
-    for i, day in enumerate(workout_data['days']):
-        day_date = start_date_obj + timedelta(days=i)
-        # Format: "Wednesday, November 27"
-        day['day'] = day_date.strftime('%A, %B %d')
+    labels = get_plan_day_labels(start_date_obj, len(workout_data['days']))
+    for day, label in zip(workout_data['days'], labels):
+        day['day'] = label
     
     return workout_data
 
+# Date labels only depend on the start date, which is shared by every plan created that day,
+# so the strftime calls (locale lookups included) run once per date rather than per plan/view
+@lru_cache(maxsize=64)
+def get_plan_day_labels(start_date_obj, num_days=7):
+    """Labels like 'Wednesday, November 27' for num_days consecutive days from start_date_obj"""
+    return tuple((start_date_obj + timedelta(days=i)).strftime('%A, %B %d') for i in range(num_days))
+
+@lru_cache(maxsize=64)
 def get_week_date_range(start_date_obj):
     """Get formatted week range string like 'Nov 26 to Dec 2'"""
     # Assuming start_date_obj is a datetime.date object
-    end_date = start_date_obj + timedelta(days=6)
+    end_date = date.fromordinal(start_date_obj.toordinal() + 6)
+    start_label = start_date_obj.strftime('%b %d')
     
     # If same month
     if start_date_obj.month == end_date.month:
-        return f"{start_date_obj.strftime('%b %d')} to {end_date.strftime('%d')}"
+        return f"{start_label} to {end_date.strftime('%d')}"
     else:
-        return f"{start_date_obj.strftime('%b %d')} to {end_date.strftime('%b %d')}"
+        return f"{start_label} to {end_date.strftime('%b %d')}"
 
-def recalculate_nutrition_targets(user_id):
-    """Recalculate all nutrition targets for a user"""
-    db = get_db()
-    try:
-        # Get user data
-        result = db.execute(text('SELECT * FROM users WHERE id = :id'), {'id': user_id})
-        user = result.fetchone()
-        
-        if not user:
-            return
-        
-        # Convert to dict for easier access
-        user_dict = dict(user._mapping)
-        
-        # Calculate BMR
-        bmr = calculate_bmr(user_dict)
-        
-        # Calculate TDEE (only if activity level is set)
-        tdee = calculate_tdee(bmr, user_dict['activity_level']) if user_dict['activity_level'] else bmr
-        
-        # Calculate caloric target (only if fitness goal is set)
-        caloric_target = calculate_caloric_target(tdee, user_dict['fitness_goals']) if user_dict['fitness_goals'] else tdee
-        
-        # Calculate macros
-        macros = calculate_macros(caloric_target, user_dict['fitness_goals']) if user_dict['fitness_goals'] else {'protein_g': 0, 'carbs_g': 0, 'fat_g': 0}
-        
-        # Update database
-        db.execute(text('''
-            UPDATE users 
-            SET bmr = :bmr, tdee = :tdee, caloric_target = :caloric_target, 
-                protein_target_g = :protein_g, carbs_target_g = :carbs_g, fat_target_g = :fat_g
-            WHERE id = :id
-        '''), {
-            'bmr': bmr, 
-            'tdee': tdee, 
-            'caloric_target': caloric_target,
-            'protein_g': macros['protein_g'], 
-            'carbs_g': macros['carbs_g'], 
-            'fat_g': macros['fat_g'],
-            'id': user_id
-        })
-        
-        db.commit()
-        
-        return {
-            'bmr': bmr,
-            'tdee': tdee,
-            'caloric_target': caloric_target,
-            'macros': macros
-        }
-        
-    except Exception as e:
-        db.rollback()
-        logger.error(f"Error recalculating nutrition targets: {e}")
-        raise
-    finally:
-        close_db()
+def recalculate_nutrition_targets(db, user):
+    """
+    Recalculate all nutrition targets for a user
+    
+    Args:
+        db: Open session; the UPDATE joins the caller's transaction, which the caller commits
+        user: Row with id, age, gender, height, weight, activity_level and fitness_goals,
+              typically from the RETURNING clause of the profile UPDATE that triggered this
+    """
+    if not user:
+        return
+    
+    bmr, tdee, caloric_target, macros = calculate_nutrition_targets(user)
+    
+    # Update database
+    db.execute(SQL_UPDATE_NUTRITION_TARGETS, {
+        'bmr': bmr, 
+        'tdee': tdee, 
+        'caloric_target': caloric_target,
+        'protein_g': macros['protein_g'], 
+        'carbs_g': macros['carbs_g'], 
+        'fat_g': macros['fat_g'],
+        'id': user.id
+    })
+    
+    return {
+        'bmr': bmr,
+        'tdee': tdee,
+        'caloric_target': caloric_target,
+        'macros': macros
+    }
 
 def parse_height_to_cm(height_str):
     """Parse height string to centimeters"""
@@ -370,59 +580,78 @@ def ensure_database_schema():
         logger.exception("Failed to initialize database schema.")
         raise
 
-# Ensure schema as soon as the app module loads (covers CLI runners & WSGI servers)
-ensure_database_schema()
+# Ensure schema as soon as the app module loads (covers CLI runners & WSGI servers).
+# Under gunicorn (see gunicorn.conf.py) FITPLAN_SCHEMA_READY is set and the master's
+# on_starting hook runs the DDL once instead, before workers are forked.
+if os.environ.get('FITPLAN_SCHEMA_READY') != '1':
+    ensure_database_schema()
+
+@app.cli.command('init-db')
+def init_db_command():
+    """Create or update the database tables (`flask init-db`)"""
+    init_db()
+    logger.info("Database schema created/updated.")
 
 # Initialize meal API client 
 meal_api = MealPlanningAPI()
 
-_api_monitor_started = False
-
-
-def start_meal_api_status_monitor():
-    """Launch a background thread that keeps track of the meal API availability."""
-    global _api_monitor_started
-    if _api_monitor_started:
-        return
-
-    def _monitor():
-        last_status = None
-        while True:
-            try:
-                available = bool(meal_api.health_check())
-            except Exception as exc:
-                logger.error(f"Error checking meal API health: {exc}")
-                available = False
-
-            app.config['MEAL_API_AVAILABLE'] = available
-
-            if last_status is None or available != last_status:
-                status_label = "available" if available else "unavailable"
-                logger.info(f"Meal planning API status changed: {status_label}")
-                last_status = available
-
-            time.sleep(API_STATUS_CHECK_SECONDS)
-
-    monitor_thread = threading.Thread(
-        target=_monitor,
-        daemon=True,
-        name="MealAPIStatusMonitor"
-    )
-    monitor_thread.start()
-    _api_monitor_started = True
-
+# Meal API availability is refreshed lazily: a request that finds the cached status older than
+# API_STATUS_CHECK_SECONDS schedules one health check on a single worker thread and carries on
+# with the current value, so an idle process makes no health-check calls at all.
+_api_status_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="MealAPIStatus")
+_api_status_lock = threading.Lock()
+_api_status_checked_at = None
+_api_status_pending = None
+_api_status_last = None
 
-start_meal_api_status_monitor()
 
+def _check_meal_api_status():
+    """Run one meal API health check and record the result in app.config."""
+    global _api_status_last
+    try:
+        available = bool(meal_api.health_check())
+    except Exception as exc:
+        logger.error(f"Error checking meal API health: {exc}")
+        available = False
+
+    app.config['MEAL_API_AVAILABLE'] = available
+
+    if available != _api_status_last:
+        status_label = "available" if available else "unavailable"
+        logger.info(f"Meal planning API status changed: {status_label}")
+        _api_status_last = available
+
+
+def get_meal_api_available():
+    """Return the cached meal API status, scheduling a background refresh when it is stale."""
+    global _api_status_checked_at, _api_status_pending
+    now = time.monotonic()
+    with _api_status_lock:
+        stale = _api_status_checked_at is None or now - _api_status_checked_at >= API_STATUS_CHECK_SECONDS
+        if stale and (_api_status_pending is None or _api_status_pending.done()):
+            _api_status_pending = _api_status_executor.submit(_check_meal_api_status)
+            _api_status_checked_at = now
+    return app.config.get('MEAL_API_AVAILABLE', True)
+
+
+# The status can only be up or down, so both the template flags and the JSON body of
+# /api/service-status are built once per state and handed out as-is
+_SERVICE_STATUS_CONTEXT = {
+    available: {
+        'generation_services_down': not available,
+        'meal_api_available': available,
+    }
+    for available in (True, False)
+}
+_SERVICE_STATUS_BODY = {
+    available: orjson.dumps({"generation_available": available})
+    for available in (True, False)
+}
 
 @app.context_processor
 def inject_service_status():
     """Expose service availability flags to all templates."""
-    available = app.config.get('MEAL_API_AVAILABLE', True)
-    return {
-        'generation_services_down': not available,
-        'meal_api_available': available,
-    }
+    return _SERVICE_STATUS_CONTEXT[bool(get_meal_api_available())]
 
 # helper functions:
 
@@ -472,6 +701,33 @@ def generate_grocery_list_from_meals(meal_plan, start_date_obj): # UPDATED signa
         logger.error(f"Error generating grocery list: {e}")
         return get_sample_grocery_data(start_date_obj) 
 
+def normalize_meal_plan(meal_plan):
+    """
+    Reshape a meal plan into the API's daily_plans list before it is stored
+    
+    The fallback from create_default_meal_plan() keys its days 1-7 under 'days'; converting it
+    once at write time means the meals page and the dashboard only ever read daily_plans.
+    """
+    if not meal_plan or 'daily_plans' in meal_plan or 'days' not in meal_plan:
+        return meal_plan
+    
+    normalized = {k: v for k, v in meal_plan.items() if k != 'days'}
+    normalized['daily_plans'] = [
+        {**day, 'meals': [{**meal, 'meal_type': meal.get('meal_type', meal.get('type', ''))}
+                          for meal in day.get('meals', [])]}
+        for _, day in sorted(meal_plan['days'].items(), key=lambda item: int(item[0]))
+    ]
+    return normalized
+
+# Title emoji per meal type, matched with one precompiled alternation instead of chained `in` scans
+MEAL_TYPE_EMOJI = {
+    'breakfast': '🌅',
+    'lunch': '🥗',
+    'dinner': '🍽️',
+    'snack': '🥜'
+}
+_MEAL_TYPE_RE = re.compile('|'.join(MEAL_TYPE_EMOJI))
+
 def transform_meal_plan_for_templates(raw_meal_plan, start_date_obj): 
     """
     Transform API response to match the format expected by templates
@@ -499,18 +755,19 @@ def transform_meal_plan_for_templates(raw_meal_plan, start_date_obj):
     
     daily_plans = raw_meal_plan['daily_plans']
     
-    # Calculate average daily calories
-    if daily_plans:
-        avg_calories = sum(day.get('target_calories', 0) for day in daily_plans) / len(daily_plans)
-        transformed['daily_calories'] = int(avg_calories)
+    # Average daily calories is accumulated in the same pass as the day transform;
+    # days without their own target are backfilled with it once the loop is done
+    total_target_calories = 0
+    days_missing_target = []
     
     # Get day names starting from the start_date's weekday
     # No rotation needed - just use sequential day names starting from start_date
     
     # Transform each day
     for i, day_plan in enumerate(daily_plans):
-        if i >= 7:  # Only handle up to 7 days
-            break
+        total_target_calories += day_plan.get('target_calories', 0)
+        if i >= 7:  # Only handle up to 7 days (extra days still count toward the average)
+            continue
         
         # Calculate the actual date for this day
         day_date_obj = week_start + timedelta(days=i)
@@ -526,6 +783,7 @@ def transform_meal_plan_for_templates(raw_meal_plan, start_date_obj):
             
             meal_calories = meal.get('calories', 0)
             total_actual_calories += meal_calories
+            meal_type = meal.get('meal_type', '').lower()
             
             transformed_meal = {
                 'title': meal.get('title', 'Untitled Meal'),
@@ -538,34 +796,132 @@ def transform_meal_plan_for_templates(raw_meal_plan, start_date_obj):
                 'quantities': meal.get('quantities', []),
                 'units': meal.get('units', []),
                 'meal_type': meal.get('meal_type', ''),
-                'type': meal.get('meal_type', '').lower()  # Add 'type' field for template
+                'type': meal_type  # Add 'type' field for template
             }
             
             # Add meal type emoji
-            meal_type = meal.get('meal_type', '').lower()
-            if 'breakfast' in meal_type:
-                transformed_meal['title'] = f"🌅 {transformed_meal['title']}"
-            elif 'lunch' in meal_type:
-                transformed_meal['title'] = f"🥗 {transformed_meal['title']}"
-            elif 'dinner' in meal_type:
-                transformed_meal['title'] = f"🍽️ {transformed_meal['title']}"
-            elif 'snack' in meal_type:
-                transformed_meal['title'] = f"🥜 {transformed_meal['title']}"
+            match = _MEAL_TYPE_RE.search(meal_type)
+            if match:
+                transformed_meal['title'] = f"{MEAL_TYPE_EMOJI[match.group()]} {transformed_meal['title']}"
             
             transformed_meals.append(transformed_meal)
         
         # Use numbered keys (1-7) as template expects
         day_number = i + 1
-        transformed['days'][day_number] = {
+        transformed_day = {
             'day_name': day_name,
             'date': day_date,
             'meals': transformed_meals,
-            'target_calories': day_plan.get('target_calories', avg_calories),
+            'target_calories': day_plan.get('target_calories'),
             'actual_calories': total_actual_calories
         }
+        if 'target_calories' not in day_plan:
+            days_missing_target.append(transformed_day)
+        transformed['days'][day_number] = transformed_day
+    
+    if daily_plans:
+        avg_calories = total_target_calories / len(daily_plans)
+        transformed['daily_calories'] = int(avg_calories)
+        for transformed_day in days_missing_target:
+            transformed_day['target_calories'] = avg_calories
     
     return transformed
 
+# Template-ready meal plans keyed by (plan id, updated_at, start_date). Plan rows only change
+# through the upsert, which bumps updated_at, so a new write simply misses the cache.
+# Each entry holds a full parsed plan, so the per-worker caches below are kept small.
+MEAL_VIEW_CACHE_SIZE = int(os.environ.get('MEAL_VIEW_CACHE_SIZE', 64))
+_meal_view_cache = LRUCache(MEAL_VIEW_CACHE_SIZE)
+
+def get_meal_plan_view(meal_plan):
+    """
+    Return transform_meal_plan_for_templates() output for a meal_plans row, memoized per process
+    
+    Args:
+        meal_plan: meal_plans Row with id, start_date, updated_at and plan_data
+    
+    Returns:
+        dict: Shared formatted plan; treat as read-only
+    """
+    key = (meal_plan.id, meal_plan.updated_at, meal_plan.start_date)
+    view = _meal_view_cache.get(key)
+    if view is None:
+        view = transform_meal_plan_for_templates(ensure_dict(meal_plan.plan_data), meal_plan.start_date)
+        if view is not None:
+            _meal_view_cache.put(key, view)
+    return view
+
+# Parsed dashboard plans keyed by the ids and versions SQL_DASHBOARD returns. Every write to a
+# plan row moves its created_at or updated_at, so a changed plan simply misses the cache.
+DASHBOARD_CACHE_SIZE = int(os.environ.get('DASHBOARD_CACHE_SIZE', 64))
+_dashboard_cache = LRUCache(DASHBOARD_CACHE_SIZE)
+
+def get_dashboard_plans(db, dashboard):
+    """
+    Return the parsed (workout, meal, grocery) plans for a SQL_DASHBOARD row, memoized per process
+    
+    Args:
+        db: Database session, used only on a cache miss
+        dashboard: SQL_DASHBOARD Row with the *_id and *_version columns
+    
+    Returns:
+        tuple: Shared (workout_data, meal_data, grocery_data) dicts or None; treat as read-only
+    """
+    key = _dashboard_cache_key(dashboard.id, dashboard)
+    plans = _dashboard_cache.get(key)
+    if plans is not None:
+        return plans
+    
+    blobs = db.execute(SQL_DASHBOARD_PLANS, {
+        'workout_id': dashboard.workout_id,
+        'meal_id': dashboard.meal_id,
+        'grocery_id': dashboard.grocery_id
+    }).fetchone()
+    plans = tuple(ensure_dict(blob) if blob is not None else None for blob in blobs)
+    _dashboard_cache.put(key, plans)
+    return plans
+
+def seed_dashboard_plans(user_id, saved, plans):
+    """
+    Cache plans create_plan just saved, so the dashboard it redirects to skips the blob fetch
+    
+    Args:
+        user_id: Owner of the plans
+        saved: SQL_UPSERT_PLANS Row with the *_id and *_version columns
+        plans: The (workout_data, meal_data, grocery_data) that were serialized into the row
+    """
+    _dashboard_cache.put(_dashboard_cache_key(user_id, saved), plans)
+
+def _dashboard_cache_key(user_id, row):
+    return (user_id,
+            row.workout_id, row.workout_version,
+            row.meal_id, row.meal_version,
+            row.grocery_id, row.grocery_version)
+
+# Parsed plan blobs for the workout and grocery pages, keyed by (table, id, created_at, updated_at);
+# every write to a plan row moves one of the two timestamps, so a changed blob simply misses
+PLAN_DATA_CACHE_SIZE = int(os.environ.get('PLAN_DATA_CACHE_SIZE', 64))
+_plan_data_cache = LRUCache(PLAN_DATA_CACHE_SIZE)
+
+def get_plan_data(table, row, blob):
+    """
+    Return ensure_dict(blob) for a plan row, memoized per process
+    
+    Args:
+        table: Table the row came from (ids are only unique per table)
+        row: Row with id, created_at and updated_at
+        blob: The row's plan_data / grocery_data text
+    
+    Returns:
+        dict: Shared parsed blob; treat as read-only
+    """
+    key = (table, row.id, row.created_at, row.updated_at)
+    data = _plan_data_cache.get(key)
+    if data is None:
+        data = ensure_dict(blob)
+        _plan_data_cache.put(key, data)
+    return data
+
 
 def get_sample_meal_data(user, start_date_obj):
     """Fallback sample meal plan when API is unavailable"""
@@ -623,66 +979,189 @@ def get_sample_meal_data(user, start_date_obj):
     }
 
 
+# Fallback grocery sections never change, so they are built once at import and
+# serialized straight from here by create_plan; only the week label is per call
+SAMPLE_GROCERY_SECTIONS = (
+    {
+        "title": "🥬 Produce",
+        "items": [
+            {"name": "Blueberries", "quantity": "2 cups"},
+            {"name": "Broccoli crowns", "quantity": "2 heads"},
+            {"name": "Sweet potatoes", "quantity": "3 medium"},
+            {"name": "Apples", "quantity": "4 large"}
+        ]
+    },
+    {
+        "title": "🥩 Protein", 
+        "items": [
+            {"name": "Chicken breast", "quantity": "2 lbs"},
+            {"name": "Salmon fillets", "quantity": "4 pieces"},
+            {"name": "Greek yogurt (plain)", "quantity": "32 oz"}
+        ]
+    },
+    {
+        "title": "🌾 Pantry",
+        "items": [
+            {"name": "Quinoa", "quantity": "1 lb bag"},
+            {"name": "GF granola", "quantity": "1 box"},
+            {"name": "Almond butter", "quantity": "1 jar"}
+        ]
+    }
+)
+
 def get_sample_grocery_data(start_date_obj): # UPDATED signature
-    """Fallback sample grocery list"""
+    """Fallback sample grocery list (the sections are shared; treat as read-only)"""
     week_str = get_week_date_range(start_date_obj) # Use the calculated start date
     
     return {
         "week": week_str,
-        "sections": [
-            {
-                "title": "🥬 Produce",
-                "items": [
-                    {"name": "Blueberries", "quantity": "2 cups"},
-                    {"name": "Broccoli crowns", "quantity": "2 heads"},
-                    {"name": "Sweet potatoes", "quantity": "3 medium"},
-                    {"name": "Apples", "quantity": "4 large"}
-                ]
-            },
-            {
-                "title": "🥩 Protein", 
-                "items": [
-                    {"name": "Chicken breast", "quantity": "2 lbs"},
-                    {"name": "Salmon fillets", "quantity": "4 pieces"},
-                    {"name": "Greek yogurt (plain)", "quantity": "32 oz"}
-                ]
-            },
-            {
-                "title": "🌾 Pantry",
-                "items": [
-                    {"name": "Quinoa", "quantity": "1 lb bag"},
-                    {"name": "GF granola", "quantity": "1 box"},
-                    {"name": "Almond butter", "quantity": "1 jar"}
-                ]
-            }
-        ]
+        "sections": SAMPLE_GROCERY_SECTIONS
     }
 
 
 # Function to check if dictionary is actual a string, convert to dictionary
+@lru_cache(maxsize=64)
+def parse_dietary_restrictions(restrictions_json):
+    """
+    Turn the stored dietary_restrictions JSON into the API's dietary list
+    
+    Only a few checkbox combinations exist, so each distinct stored string is parsed
+    once per process. 'none' is a UI marker, not a restriction, and is dropped.
+    
+    Returns:
+        tuple: Lowercased restrictions (a tuple so the cached value can't be mutated)
+    """
+    if not restrictions_json:
+        return ()
+    try:
+        restrictions = orjson.loads(restrictions_json)
+    except (json.JSONDecodeError, TypeError):
+        return ()
+    cleaned = (r.strip().lower() for r in restrictions)
+    return tuple(r for r in cleaned if r and r != 'none')
+
 def ensure_dict(value):
     if isinstance(value, str):
         try:
-            return json.loads(value)
+            return orjson.loads(value)
         except json.JSONDecodeError:
             return {}
     return value
 
 # ==================== TEMPLATE FILTERS ====================
 
+# Profile fields are short checkbox lists with few distinct values, so each stored
+# string is parsed once per process; the cached lists are shared, treat as read-only
+@lru_cache(maxsize=256)
+def _parse_json_field(value):
+    try:
+        return orjson.loads(value)
+    except (json.JSONDecodeError, TypeError):
+        return []
+
 @app.template_filter('fromjson')
 def fromjson_filter(value):
     if value is None:
         return []
     if isinstance(value, str):
-        try:
-            return json.loads(value)
-        except (json.JSONDecodeError, TypeError):
-            return []
+        return _parse_json_field(value)
     return value
 
+# Bind the C hash constructors once so the login/register and ETag paths skip the module lookups
+_blake2b = hashlib.blake2b
+_sha256 = hashlib.sha256
+_scrypt = hashlib.scrypt
+
+# scrypt cost parameters; stored alongside each hash as scrypt$n$r$p$salt$hash so they can be raised later
+SCRYPT_N, SCRYPT_R, SCRYPT_P = 2**14, 8, 1
+
 def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Salted scrypt hash of a password, in the scrypt$n$r$p$salt$hash storage format"""
+    salt = os.urandom(16)
+    digest = _scrypt(password.encode('utf-8'), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P, dklen=32)
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}"
+
+def legacy_hash_password(password):
+    """Unsalted SHA-256 digest used by accounts created before the scrypt switch"""
+    return _sha256(password.encode('utf-8')).hexdigest()
+
+def verify_password(password, stored):
+    """
+    Check a password against its stored hash in constant time
+    
+    Returns:
+        tuple: (matches, needs_rehash); needs_rehash is True for legacy SHA-256 digests
+    """
+    if stored.startswith('scrypt$'):
+        _, n, r, p, salt, digest = stored.split('$')
+        candidate = _scrypt(password.encode('utf-8'), salt=bytes.fromhex(salt),
+                            n=int(n), r=int(r), p=int(p), dklen=len(digest) // 2)
+        return hmac.compare_digest(candidate.hex(), digest), False
+    if hmac.compare_digest(legacy_hash_password(password), stored):
+        return True, True
+    return False, False
+
+# ==================== REQUEST-SCOPED HELPERS ====================
+
+def get_current_user(query):
+    """
+    Return the logged-in user's row, querying the database at most once per request
+    
+    Args:
+        query: One of the projected SQL_USER_* selects; each is cached separately, so a
+               narrow row is never handed out for a query that needs other columns
+    """
+    user_rows = g.setdefault('user_rows', {})
+    if query.text not in user_rows:
+        user_id = session.get('user_id')
+        user = None
+        if user_id is not None:
+            user = get_db().execute(query, {'id': user_id}).fetchone()
+        user_rows[query.text] = user
+    return user_rows[query.text]
+
+def forget_current_user():
+    """Drop the request's cached user rows after an UPDATE to them has been committed"""
+    g.pop('user_rows', None)
+
+def _render_version():
+    """Digest of this module and the templates, so a deploy that changes either invalidates page ETags"""
+    digest = _blake2b(digest_size=8)
+    template_dir = os.path.join(app.root_path, app.template_folder)
+    for path in [__file__] + sorted(glob.glob(os.path.join(template_dir, '**', '*.html'), recursive=True)):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+RENDER_VERSION = _render_version()
+
+def plan_page_etag(plan, user_today):
+    """
+    Validator for a plan page, derived from everything the rendered page depends on
+    
+    Args:
+        plan: workout_plans / meal_plans / grocery_lists Row (writes bump created_at or updated_at)
+        user_today: The user's current date, which picks the highlighted day (None for the grocery page)
+    """
+    parts = (RENDER_VERSION, session.get('user_id'), session.get('user_name'), plan.id, plan.created_at,
+             plan.updated_at, user_today, bool(get_meal_api_available()))
+    return _blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+
+def plan_page_not_modified(etag):
+    """True when the browser's copy is current; pending flashes always force a fresh render"""
+    return '_flashes' not in session and request.if_none_match.contains(etag)
+
+def with_plan_page_etag(rv, etag):
+    """Attach the ETag and make the browser revalidate (private: pages are per user)"""
+    response = make_response(rv)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+@app.teardown_appcontext
+def teardown_db(exception=None):
+    """Release the scoped session once per request, whatever the view did"""
+    close_db()
 
 # ==================== ROUTES ====================
 
@@ -709,12 +1188,11 @@ def register():
     
     db = get_db()
     try:
-        db.execute(text('INSERT INTO users (name, email, password) VALUES (:name, :email, :password)'),
-                    {'name': name, 'email': email, 'password': hash_password(password)})
+        # RETURNING hands back the new id, so no second lookup by email
+        user = db.execute(SQL_INSERT_USER,
+                    {'name': name, 'email': email, 'password': hash_password(password)}).fetchone()
         db.commit()
         
-        result = db.execute(text('SELECT * FROM users WHERE email = :email'), {'email': email})
-        user = result.fetchone()
         session['user_id'] = user.id
         session['user_name'] = user.name
         
@@ -726,8 +1204,6 @@ def register():
         else:
             flash('Registration error')
         return redirect(url_for('signup'))
-    finally:
-        close_db()
 
 @app.route('/login', methods=['POST'])
 def login():
@@ -735,20 +1211,27 @@ def login():
     password = request.form['password']
     
     db = get_db()
-    try:
-        result = db.execute(text('SELECT * FROM users WHERE email = :email AND password = :password'),
-                            {'email': email, 'password': hash_password(password)})
-        user = result.fetchone()
-        
-        if user:
-            session['user_id'] = user.id
-            session['user_name'] = user.name
-            return redirect(url_for('dashboard'))
-        else:
-            flash('Invalid email or password')
-            return redirect(url_for('index'))
-    finally:
-        close_db()
+    result = db.execute(SQL_USER_CREDENTIALS,
+                        {'email': email})
+    user = result.fetchone()
+    
+    if user:
+        matches, needs_rehash = verify_password(password, user.password)
+        if not matches:
+            user = None
+        elif needs_rehash:
+            # Upgrade old unsalted digests to scrypt now that we have the plaintext
+            db.execute(SQL_UPDATE_PASSWORD,
+                       {'password': hash_password(password), 'id': user.id})
+            db.commit()
+    
+    if user:
+        session['user_id'] = user.id
+        session['user_name'] = user.name
+        return redirect(url_for('dashboard'))
+    else:
+        flash('Invalid email or password')
+        return redirect(url_for('index'))
 
 @app.route('/questionnaire-intro')
 @no_cache
@@ -767,31 +1250,20 @@ def basic_info():
     # END debug
     if 'user_id' not in session:
         return redirect(url_for('index'))
-    db = get_db()
-    try:
-        # Get existing user data if any
-        result = db.execute(text('SELECT * FROM users WHERE id = :id'), {'id': session['user_id']})
-        user = result.fetchone()
-        # DEBUG: Print session info
-        logger.info(f"Fetched user_id: {session.get('user_id')}")
-        logger.info(f"Fetched user_name: {session.get('user_name')}")
-        logger.info(f"Fetched Full session: {dict(session)}")
-        logger.info(f"User: {user}")
-        
-        # END debug
-        
-        # Convert to dict for template
-        user_data = dict(user._mapping) if user else {}
-        
-        # Convert height back to feet and inches for display
-        if user_data.get('height'):
-            feet, inches = inches_to_feet_inches(user_data['height'])
-            user_data['height_feet'] = feet
-            user_data['height_inches'] = inches
-        
-        return render_template('basic_info.html', user=user_data)
-    finally:
-        close_db()
+    # Get existing user data if any
+    user = get_current_user(SQL_USER_BASIC_INFO)
+    # DEBUG: Print session info
+    logger.info(f"User: {user}")
+    # END debug
+    
+    # Only the fields the form shows, with height converted back to feet and inches
+    user_data = {}
+    if user:
+        feet, inches = inches_to_feet_inches(user.height) if user.height else (None, None)
+        user_data = SimpleNamespace(gender=user.gender, age=user.age, weight=user.weight,
+                                    height_feet=feet, height_inches=inches)
+    
+    return render_template('basic_info.html', user=user_data)
 
 @app.route('/save-basic-info', methods=['POST'])
 @no_cache
@@ -808,12 +1280,12 @@ def save_basic_info():
     
     db = get_db()
     try:
-        db.execute(text('UPDATE users SET gender = :gender, age = :age, height = :height, weight = :weight WHERE id = :id'),
-                    {'gender': gender, 'age': age, 'height': total_height_inches, 'weight': weight_lbs, 'id': session['user_id']})
-        db.commit()
+        result = db.execute(SQL_UPDATE_BASIC_INFO, {'gender': gender, 'age': age, 'height': total_height_inches, 'weight': weight_lbs, 'id': session['user_id']})
         
-        # Recalculate after basic info update
-        recalculate_nutrition_targets(session['user_id'])
+        # Recalculate after basic info update, in the same transaction
+        recalculate_nutrition_targets(db, result.fetchone())
+        db.commit()
+        forget_current_user()
         
         return redirect(url_for('activity_level'))
     except Exception as e:
@@ -821,23 +1293,14 @@ def save_basic_info():
         flash('Error saving basic info')
         logger.error(f"Error saving basic info: {e}")
         return redirect(url_for('basic_info'))
-    finally:
-        close_db()
 
 @app.route('/activity-level')
 @no_cache
 def activity_level():
     if 'user_id' not in session:
         return redirect(url_for('index'))   
-    db = get_db()
-    try:
-        result = db.execute(text('SELECT * FROM users WHERE id = :id'), {'id': session['user_id']})
-        user = result.fetchone()
-        user_data = dict(user._mapping) if user else {}
-
-        return render_template('activity_level.html', user=user_data)
-    finally:
-        close_db()
+    user = get_current_user(SQL_USER_QUESTIONNAIRE)
+    return render_template('activity_level.html', user=user or {})
 
 @app.route('/save-activity-level', methods=['POST'])
 @no_cache
@@ -849,12 +1312,13 @@ def save_activity_level():
     
     db = get_db()
     try:
-        db.execute(text('UPDATE users SET activity_level = :activity WHERE id = :id'),
-                    {'activity': activity, 'id': session['user_id']})
-        db.commit()
+        result = db.execute(SQL_UPDATE_ACTIVITY_LEVEL,
+                            {'activity': activity, 'id': session['user_id']})
         
-        # Recalculate after activity level update
-        recalculate_nutrition_targets(session['user_id'])
+        # Recalculate after activity level update, in the same transaction
+        recalculate_nutrition_targets(db, result.fetchone())
+        db.commit()
+        forget_current_user()
         
         return redirect(url_for('fitness_goals'))
     except Exception as e:
@@ -862,23 +1326,14 @@ def save_activity_level():
         flash('Error saving activity level')
         logger.error(f"Error saving activity level: {e}")
         return redirect(url_for('activity_level'))
-    finally:
-        close_db()
 
 @app.route('/fitness-goals')
 @no_cache
 def fitness_goals():
     if 'user_id' not in session:
         return redirect(url_for('index'))
-    db = get_db()
-    try:
-        result = db.execute(text('SELECT * FROM users WHERE id = :id'), {'id': session['user_id']})
-        user = result.fetchone()
-        user_data = dict(user._mapping) if user else {}
-
-        return render_template('fitness_goals.html', user=user_data)
-    finally:
-        close_db()
+    user = get_current_user(SQL_USER_QUESTIONNAIRE)
+    return render_template('fitness_goals.html', user=user or {})
 
 @app.route('/save-fitness-goals', methods=['POST'])
 @no_cache
@@ -890,12 +1345,13 @@ def save_fitness_goals():
     
     db = get_db()
     try:
-        db.execute(text('UPDATE users SET fitness_goals = :goals WHERE id = :id'),
-                    {'goals': goals, 'id': session['user_id']})
-        db.commit()
+        result = db.execute(SQL_UPDATE_FITNESS_GOALS,
+                            {'goals': goals, 'id': session['user_id']})
         
-        # Recalculate after fitness goals update
-        recalculate_nutrition_targets(session['user_id'])
+        # Recalculate after fitness goals update, in the same transaction
+        recalculate_nutrition_targets(db, result.fetchone())
+        db.commit()
+        forget_current_user()
         
         return redirect(url_for('equipment_access'))
     except Exception as e:
@@ -903,22 +1359,14 @@ def save_fitness_goals():
         flash('Error saving fitness goals')
         logger.error(f"Error saving fitness goals: {e}")
         return redirect(url_for('fitness_goals'))
-    finally:
-        close_db()
 
 @app.route('/equipment-access')
 @no_cache
 def equipment_access():
     if 'user_id' not in session:
         return redirect(url_for('index'))
-    db = get_db()
-    try:
-        result = db.execute(text('SELECT * FROM users WHERE id = :id'), {'id': session['user_id']})
-        user = result.fetchone()
-        user_data = dict(user._mapping) if user else {}
-        return render_template('equipment_access.html', user=user_data)
-    finally:
-        close_db()
+    user = get_current_user(SQL_USER_QUESTIONNAIRE)
+    return render_template('equipment_access.html', user=user or {})
 
 @app.route('/save-equipment-access', methods=['POST'])
 @no_cache
@@ -927,13 +1375,14 @@ def save_equipment_access():
         return redirect(url_for('index'))
     
     equipment = request.form.getlist('equipment')
-    equipment_json = json.dumps(equipment)
+    equipment_json = app.json.dumps(equipment)
     
     db = get_db()
     try:
-        db.execute(text('UPDATE users SET available_equipment = :equipment WHERE id = :id'),
+        db.execute(SQL_UPDATE_EQUIPMENT,
                     {'equipment': equipment_json, 'id': session['user_id']})
         db.commit()
+        forget_current_user()
         
         return redirect(url_for('workout_schedule'))
     except Exception as e:
@@ -941,22 +1390,14 @@ def save_equipment_access():
         flash('Error saving equipment access')
         logger.error(f"Error saving equipment access: {e}")
         return redirect(url_for('equipment_access'))
-    finally:
-        close_db()
 
 @app.route('/workout-schedule')
 @no_cache
 def workout_schedule():
     if 'user_id' not in session:
         return redirect(url_for('index'))
-    db = get_db()
-    try:
-        result = db.execute(text('SELECT * FROM users WHERE id = :id'), {'id': session['user_id']})
-        user = result.fetchone()
-        user_data = dict(user._mapping) if user else {}
-        return render_template('workout_schedule.html', user=user_data)
-    finally:
-        close_db()
+    user = get_current_user(SQL_USER_QUESTIONNAIRE)
+    return render_template('workout_schedule.html', user=user or {})
 
 @app.route('/save-workout-schedule', methods=['POST'])
 @no_cache
@@ -968,9 +1409,10 @@ def save_workout_schedule():
     
     db = get_db()
     try:
-        db.execute(text('UPDATE users SET workout_schedule = :schedule WHERE id = :id'),
+        db.execute(SQL_UPDATE_WORKOUT_SCHEDULE,
                     {'schedule': schedule, 'id': session['user_id']})
         db.commit()
+        forget_current_user()
         
         return redirect(url_for('physical_limitations'))
     except Exception as e:
@@ -978,22 +1420,14 @@ def save_workout_schedule():
         flash('Error saving workout schedule')
         logger.error(f"Error saving workout schedule: {e}")
         return redirect(url_for('workout_schedule'))
-    finally:
-        close_db()
 
 @app.route('/physical-limitations')
 @no_cache
 def physical_limitations():
     if 'user_id' not in session:
         return redirect(url_for('index'))
-    db = get_db()
-    try:
-        result = db.execute(text('SELECT * FROM users WHERE id = :id'), {'id': session['user_id']})
-        user = result.fetchone()
-        user_data = dict(user._mapping) if user else {}
-        return render_template('physical_limitations.html',user=user_data)
-    finally:
-        close_db()
+    user = get_current_user(SQL_USER_QUESTIONNAIRE)
+    return render_template('physical_limitations.html', user=user or {})
 
 @app.route('/save-physical-limitations', methods=['POST'])
 @no_cache
@@ -1002,13 +1436,14 @@ def save_physical_limitations():
         return redirect(url_for('index'))
     
     limitations = request.form.getlist('physical_limitations')
-    limitations_json = json.dumps(limitations)
+    limitations_json = app.json.dumps(limitations)
     
     db = get_db()
     try:
-        db.execute(text('UPDATE users SET physical_limitations = :limitations WHERE id = :id'),
+        db.execute(SQL_UPDATE_PHYSICAL_LIMITATIONS,
                     {'limitations': limitations_json, 'id': session['user_id']})
         db.commit()
+        forget_current_user()
         
         return redirect(url_for('dietary_restrictions'))
     except Exception as e:
@@ -1016,22 +1451,14 @@ def save_physical_limitations():
         flash('Error saving physical limitations')
         logger.error(f"Error saving physical limitations: {e}")
         return redirect(url_for('physical_limitations'))
-    finally:
-        close_db()
 
 @app.route('/dietary-restrictions')
 @no_cache
 def dietary_restrictions():
     if 'user_id' not in session:
         return redirect(url_for('index'))
-    db = get_db()
-    try:
-        result = db.execute(text('SELECT * FROM users WHERE id = :id'), {'id': session['user_id']})
-        user = result.fetchone()
-        user_data = dict(user._mapping) if user else {}
-        return render_template('dietary_restrictions.html', user=user_data)
-    finally:
-        close_db()
+    user = get_current_user(SQL_USER_QUESTIONNAIRE)
+    return render_template('dietary_restrictions.html', user=user or {})
 
 @app.route('/save-dietary-restrictions', methods=['POST'])
 @no_cache
@@ -1039,14 +1466,16 @@ def save_dietary_restrictions():
     if 'user_id' not in session:
         return redirect(url_for('index'))
     
-    restrictions = request.form.getlist('dietary_restrictions')
-    restrictions_json = json.dumps(restrictions)
+    # Normalize once at write time so readers don't have to
+    restrictions = [r.strip().lower() for r in request.form.getlist('dietary_restrictions') if r.strip()]
+    restrictions_json = app.json.dumps(restrictions)
     
     db = get_db()
     try:
-        db.execute(text('UPDATE users SET dietary_restrictions = :restrictions WHERE id = :id'),
+        db.execute(SQL_UPDATE_DIETARY_RESTRICTIONS,
                     {'restrictions': restrictions_json, 'id': session['user_id']})
         db.commit()
+        forget_current_user()
         
         return redirect(url_for('food_preferences'))
     except Exception as e:
@@ -1054,8 +1483,6 @@ def save_dietary_restrictions():
         flash('Error saving dietary restrictions')
         logger.error(f"Error saving dietary restrictions: {e}")
         return redirect(url_for('dietary_restrictions'))
-    finally:
-        close_db()
 
 @app.route('/food-preferences')
 @no_cache
@@ -1063,16 +1490,8 @@ def food_preferences():
     if 'user_id' not in session:
         return redirect(url_for('index'))
     
-    db = get_db()
-    try:
-        result = db.execute(
-            text('SELECT * FROM users WHERE id = :user_id'),
-            {'user_id': session['user_id']}
-        )
-        user = result.fetchone()
-        return render_template('food_preferences.html', user=user)
-    finally:
-        close_db()
+    user = get_current_user(SQL_USER_FOOD_PREFERENCES)
+    return render_template('food_preferences.html', user=user)
 
 @app.route('/save-food-preferences', methods=['POST'])
 @no_cache
@@ -1085,23 +1504,18 @@ def save_food_preferences():
     
     db = get_db()
     try:
-        db.execute(text('''
-            UPDATE users 
-            SET food_preferences = :preferences, food_exclusions = :exclusions
-            WHERE id = :user_id
-        '''), {
+        db.execute(SQL_UPDATE_FOOD_PREFERENCES, {
             'preferences': food_preferences,
             'exclusions': food_exclusions,
             'user_id': session['user_id']
         })
         db.commit()
+        forget_current_user()
         return redirect(url_for('profile_summary'))
     except Exception as e:
         db.rollback()
         flash(f'Error saving food preferences: {str(e)}')
         return redirect(url_for('food_preferences'))
-    finally:
-        close_db()
 
 @app.route('/profile_summary')
 @no_cache
@@ -1109,25 +1523,9 @@ def profile_summary():
     if 'user_id' not in session:
         return redirect(url_for('index'))
     
-    db = get_db()
-    try:
-        result = db.execute(text('SELECT * FROM users WHERE id = :id'), 
-                            {'id': session['user_id']})
-        user = result.fetchone()
-        
-        # Convert for display
-        feet, inches = inches_to_feet_inches(user.height)
-        
-        user_display = {
-            **dict(user._mapping),
-            'height_feet': feet,
-            'height_inches': inches,
-            'weight_display': f"{user.weight} lbs"
-        }
-        
-        return render_template('profile_summary.html', user=user_display)
-    finally:
-        close_db()
+    # The template formats height/weight itself, so the Row goes straight through
+    user = get_current_user(SQL_USER_PROFILE_SUMMARY)
+    return render_template('profile_summary.html', user=user)
 
 @app.route('/create-plan', methods=['POST'])
 def create_plan():
@@ -1135,7 +1533,7 @@ def create_plan():
     if 'user_id' not in session:
         return redirect(url_for('index'))
 
-    if not app.config.get('MEAL_API_AVAILABLE', True):
+    if not get_meal_api_available():
         flash('Plan generation is currently unavailable. Please try again soon.', 'error')
         return redirect(url_for('profile_summary'))
     
@@ -1145,7 +1543,6 @@ def create_plan():
     user_timezone = request.form.get('user_timezone', 'US/Pacific')
     # CALCULATE START DATE (Local to User)
     start_date_obj = get_user_current_date(user_timezone)
-    start_date_str = start_date_obj.strftime('%Y-%m-%d')
         
     # Get privacy acceptance
     privacy_accepted = request.form.get('privacy_accepted')
@@ -1157,33 +1554,21 @@ def create_plan():
     timestamp = datetime.now(timezone.utc) # Keep audit log in UTC
     db = get_db()
     try:
-        # Update privacy acceptance
-        db.execute(text('''
-            UPDATE users 
-            SET privacy_accepted = TRUE, 
-                privacy_accepted_at = :timestamp,
-                timezone = :tz
-            WHERE id = :user_id
-        '''), {
+        # Update privacy acceptance; RETURNING hands back the updated user row in the same round trip
+        result = db.execute(SQL_ACCEPT_PRIVACY, {
             'timestamp': timestamp,
             'tz': user_timezone,
             'user_id': user_id
         })
-        db.commit()
-        
-        # Get user data
-        result = db.execute(text('SELECT * FROM users WHERE id = :id'), {'id': user_id})
         user = result.fetchone()
-        user_dict = dict(user._mapping)
+        db.commit()
+        forget_current_user()
         
-        # ============ GENERATE WORKOUT PLAN ============
+        # ============ GENERATE WORKOUT PLAN (IN BACKGROUND) ============
+        # Independent of the meal plan, so it overlaps with the meal API call below;
+        # the generator opens its own connections rather than sharing this request's session
         logger.info(f"Generating workout plan for user {user_id}")
-        workout_generator = WorkoutGenerator(exercise_db='exercises.db')
-        workout_data = workout_generator.generate_weekly_plan(user_id)
-        
-        # ============ ROTATE WORKOUT PLAN TO ALIGN WITH START DATE ============
-        logger.info(f"Rotating workout plan to start on {start_date_obj.strftime('%A, %B %d')}")
-        workout_data = rotate_workout_plan_to_start_date(workout_data, start_date_obj)
+        workout_future = _workout_plan_executor.submit(get_workout_generator().generate_weekly_plan, user_id)
         
         # ============ GENERATE MEAL PLAN (API CALL) ============
         logger.info(f"Generating meal plan for user {user_id}")
@@ -1192,21 +1577,15 @@ def create_plan():
         
         try:
             # Parse dietary restrictions
-            dietary = []
-            if user_dict['dietary_restrictions']:
-                try:
-                    restrictions = json.loads(user_dict['dietary_restrictions'])
-                    dietary = [r.strip().lower() for r in restrictions if r.strip() and r.strip().lower() != 'none']
-                except (json.JSONDecodeError, TypeError):
-                    dietary = []
+            dietary = list(parse_dietary_restrictions(user.dietary_restrictions))
             
-            # logging.info(f"User Dictionary: {user_dict}")
+            # logging.info(f"User: {user}")
             # Call meal planning API
             raw_meal_plan = meal_api.generate_meal_plan(
-                target_calories=float(user_dict['caloric_target'] or 2000),
-                target_carbs=float(user_dict['carbs_target_g'] or 0),
-                target_protein=float(user_dict['protein_target_g'] or 0),
-                target_fat=float(user_dict['fat_target_g'] or 0),
+                target_calories=float(user.caloric_target or 2000),
+                target_carbs=float(user.carbs_target_g or 0),
+                target_protein=float(user.protein_target_g or 0),
+                target_fat=float(user.fat_target_g or 0),
                 dietary=dietary,
                 preferences=user.food_preferences,
                 exclusions=user.food_exclusions,
@@ -1224,92 +1603,76 @@ def create_plan():
             else:
                 logger.warning(f"Meal API returned None, using fallback for user {user_id}")
                 # Create default plan
-                meal_data = meal_api.create_default_meal_plan(start_date_obj, int(user_dict['caloric_target'] or 2000))
+                meal_data = meal_api.create_default_meal_plan(start_date_obj, int(user.caloric_target or 2000))
                 grocery_data = get_sample_grocery_data(start_date_obj)
         
         except MealPlanningAPIError as e:
             logger.error(f"Meal API validation error: {str(e)}")
-            meal_data = meal_api.create_default_meal_plan(start_date_obj, int(user_dict['caloric_target'] or 2000))
+            meal_data = meal_api.create_default_meal_plan(start_date_obj, int(user.caloric_target or 2000))
             grocery_data = get_sample_grocery_data(start_date_obj)
             flash('Using default meal plan - meal service validation error', 'warning')
         
-        except Exception as e:
-            logger.error(f"Error generating meal plan: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            meal_data = meal_api.create_default_meal_plan(start_date_obj, int(user_dict['caloric_target'] or 2000))
+        except Exception:
+            logger.exception("Error generating meal plan")
+            meal_data = meal_api.create_default_meal_plan(start_date_obj, int(user.caloric_target or 2000))
             grocery_data = get_sample_grocery_data(start_date_obj)
             flash('Using default meal plan - error occurred', 'warning')
         
-        # ============ SAVE EVERYTHING TO DATABASE ============
+        # Every stored meal plan has the daily_plans shape, whichever path produced it
+        meal_data = normalize_meal_plan(meal_data)
         
-        # Save workout plan (upsert to overwrite existing weeks)
-        db.execute(text('''
-            INSERT INTO workout_plans (user_id, start_date, plan_data)
-            VALUES (:user_id, :start_date, :plan_data)
-            ON CONFLICT (user_id, start_date)
-            DO UPDATE SET
-                plan_data = EXCLUDED.plan_data,
-                updated_at = CURRENT_TIMESTAMP
-        '''), {
-            'user_id': user_id,
-            'start_date': start_date_str,
-            'plan_data': json.dumps(workout_data, cls=DecimalEncoder)
-        })
+        # Errors from the workout generator re-raise here and take the outer error path
+        workout_data = workout_future.result()
         
-        # Save meal plan (storing the RAW API output)
-        db.execute(text('''
-            INSERT INTO meal_plans (user_id, start_date, plan_data)
-            VALUES (:user_id, :start_date, :plan_data)
-            ON CONFLICT (user_id, start_date)
-            DO UPDATE SET
-                plan_data = EXCLUDED.plan_data,
-                updated_at = CURRENT_TIMESTAMP
-        '''), {
-            'user_id': user_id,
-            'start_date': start_date_str,
-            'plan_data': json.dumps(meal_data, cls=DecimalEncoder)
-        })
+        # ============ ROTATE WORKOUT PLAN TO ALIGN WITH START DATE ============
+        logger.info(f"Rotating workout plan to start on {start_date_obj.strftime('%A, %B %d')}")
+        workout_data = rotate_workout_plan_to_start_date(workout_data, start_date_obj)
+        
+        # ============ SAVE EVERYTHING TO DATABASE ============
         
-        # Save grocery list
-        db.execute(text('''
-            INSERT INTO grocery_lists (user_id, start_date, grocery_data)
-            VALUES (:user_id, :start_date, :grocery_data)
-            ON CONFLICT (user_id, start_date)
-            DO UPDATE SET
-                grocery_data = EXCLUDED.grocery_data,
-                updated_at = CURRENT_TIMESTAMP
-        '''), {
+        # Upsert workout plan, meal plan (the RAW API output) and grocery list in one statement
+        # so existing plans for this start date are overwritten
+        db.execute(SQL_ASYNC_COMMIT)
+        saved = db.execute(SQL_UPSERT_PLANS, {
             'user_id': user_id,
-            'start_date': start_date_str,
-            'grocery_data': json.dumps(grocery_data, cls=DecimalEncoder)
-        })
+            'start_date': start_date_obj,  # psycopg2 binds date objects directly
+            'workout_data': app.json.dumps(workout_data),
+            'meal_data': app.json.dumps(meal_data),
+            'grocery_data': app.json.dumps(grocery_data)
+        }).fetchone()
         
         db.commit()
+        # The dashboard we redirect to only needs these plans' summary fields, so hand it the
+        # in-memory copies rather than having it re-read and re-parse what was just written
+        seed_dashboard_plans(user_id, saved, (workout_data, meal_data, grocery_data))
         
         flash('Your personalized plans have been created!', 'info')
         return redirect(url_for('dashboard'))
         
-    except Exception as e:
+    except Exception:
         db.rollback()
-        logger.error(f"Error in create_plan: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error in create_plan")
         flash('Error creating plan. Please try again.', 'error')
         return redirect(url_for('profile_summary'))
-    finally:
-        close_db()
 
 @app.route('/privacy-policy')
 def privacy_policy():
-    current_date = datetime.now().strftime('%B %d, %Y')
-    return render_template('privacy_policy.html', current_date=current_date)
+    current_date = date.today().strftime('%B %d, %Y')
+    # Checked before rendering, which consumes the flashes
+    has_flashes = '_flashes' in session
+    response = make_response(render_template('privacy_policy.html', current_date=current_date))
+    # Static page apart from the date, so let the browser reuse it for an hour. base.html renders
+    # the session's flashes and service status, so shared caches must not store it, and a page
+    # that showed a flash is not reused at all.
+    if not has_flashes:
+        response.headers['Cache-Control'] = 'private, max-age=3600'
+    return response
 
 @app.route('/api/service-status')
 def service_status_api():
     """Expose the current availability of generation services."""
-    available = bool(app.config.get('MEAL_API_AVAILABLE', True))
-    return jsonify({"generation_available": available})
+    body = _SERVICE_STATUS_BODY[bool(get_meal_api_available())]
+    return app.response_class(body, mimetype=app.json.mimetype)
 
 
 @app.route('/dashboard')
@@ -1318,66 +1681,45 @@ def dashboard():
         return redirect(url_for('index'))
     
     db = get_db()
-    try:
-        # Get user nutrition data
-        result = db.execute(text('SELECT * FROM users WHERE id = :id'), {'id': session['user_id']})
-        user = result.fetchone()
-        user_dict = dict(user._mapping)
-        user_tz = user_dict.get('timezone', 'UTC')
-        user_today = get_user_current_date(user_tz)       
-        # logging.info(f"User dict: {user_dict}")
-        
-        # Get latest plans
-        result = db.execute(text('SELECT * FROM workout_plans WHERE user_id = :id ORDER BY created_at DESC LIMIT 1'),
-                            {'id': session['user_id']})
-        workout_plan = result.fetchone()
-        # logging.info(f"Workout plan: {workout_plan}")
-        
-        result = db.execute(text('SELECT * FROM meal_plans WHERE user_id = :id ORDER BY created_at DESC LIMIT 1'),
-                            {'id': session['user_id']})
-        meal_plan = result.fetchone()
-        # logging.info(f"Meal plan: {meal_plan}")
-        
-        result = db.execute(text('SELECT * FROM grocery_lists WHERE user_id = :id ORDER BY created_at DESC LIMIT 1'), 
-                                {'id': session['user_id']})
-        grocery_list = result.fetchone()
-        # logging.info(f"Grocery list: {grocery_list}")
-
-        workout_data = ensure_dict(workout_plan.plan_data) if workout_plan else None
-        meal_data = ensure_dict(meal_plan.plan_data) if meal_plan else None
-        grocery_data = ensure_dict(grocery_list.grocery_data) if grocery_list else None
+    # Get user nutrition data and the versions of the latest plans in a single query
+    user = db.execute(SQL_DASHBOARD, {'id': session['user_id']}).fetchone()
+    user_tz = user.timezone
+    user_today = get_user_current_date(user_tz)       
+    # logging.info(f"User: {user}")
+
+    # Plan blobs are only fetched and parsed when a plan changed since the last view
+    workout_data, meal_data, grocery_data = get_dashboard_plans(db, user)
+
+    # Extract first day from meal_data for dashboard preview
+    current_day_number = 1
+    if user.meal_start_date:
+        current_day_number = get_current_plan_day(user.meal_start_date, user_today)
+    display_day = min(current_day_number, 7)
+    daily_plans = meal_data.get('daily_plans') if meal_data else None
+    first_day = daily_plans[display_day - 1] if daily_plans and len(daily_plans) >= display_day else None
+    
+    # Prepare nutrition targets
+    nutrition_targets = None
+    if user and user.caloric_target:
+        # Percentages are generated columns, recomputed by Postgres whenever the targets change
+        nutrition_targets = {
+            'calories': int(user.caloric_target),
+            'protein_g': round(user.protein_target_g, 1) if user.protein_target_g else 0,
+            'carbs_g': round(user.carbs_target_g, 1) if user.carbs_target_g else 0,
+            'fat_g': round(user.fat_target_g, 1) if user.fat_target_g else 0,
+            'protein_pct': user.protein_pct,
+            'carbs_pct': user.carbs_pct,
+            'fat_pct': user.fat_pct
+        }
 
-        # Extract first day from meal_data for dashboard preview
-        current_day_number = 1
-        if meal_plan:
-            current_day_number = get_current_plan_day(meal_plan.start_date.strftime("%Y-%m-%d"), user_tz)        
-        display_day = min(current_day_number, 7)
-        
-        # Prepare nutrition targets
-        nutrition_targets = None
-        if user and user_dict['caloric_target']:
-            nutrition_targets = {
-                'calories': int(user_dict['caloric_target']),
-                'protein_g': round(user_dict['protein_target_g'], 1) if user_dict['protein_target_g'] else 0,
-                'carbs_g': round(user_dict['carbs_target_g'], 1) if user_dict['carbs_target_g'] else 0,
-                'fat_g': round(user_dict['fat_target_g'], 1) if user_dict['fat_target_g'] else 0
-            }
-        
-        # Calculate percentages
-        if nutrition_targets['calories'] > 0:
-            nutrition_targets['protein_pct'] = int((nutrition_targets['protein_g'] * 4 / nutrition_targets['calories']) * 100)
-            nutrition_targets['carbs_pct'] = int((nutrition_targets['carbs_g'] * 4 / nutrition_targets['calories']) * 100)
-            nutrition_targets['fat_pct'] = int((nutrition_targets['fat_g'] * 9 / nutrition_targets['calories']) * 100)
-
-        return render_template('dashboard.html', 
-                                workout_plan=workout_data,
-                                meal_plan=meal_data,
-                                current_day=display_day,
-                                grocery_list=grocery_data,
-                                nutrition_targets=nutrition_targets,
-                                user_name=session.get('user_name'))
-    finally:
-        close_db()
+    return render_template('dashboard.html', 
+                            workout_plan=workout_data,
+                            meal_plan=meal_data,
+                            first_day=first_day,
+                            current_day=display_day,
+                            grocery_list=grocery_data,
+                            nutrition_targets=nutrition_targets,
+                            user_name=session.get('user_name'))
 
 @app.route('/workout')
 def workout_page():
@@ -1385,39 +1727,35 @@ def workout_page():
         return redirect(url_for('index'))
     
     db = get_db()
-    try:
-        # Get user info and timezone
-        result = db.execute(text('SELECT * FROM users WHERE id = :id'), {'id': session['user_id']})
-        user = result.fetchone()
-        user_tz = dict(user._mapping).get('timezone', 'UTC')
-        user_today = get_user_current_date(user_tz)
-        
-        # Find the active workout plan
-        query = text('''
-            SELECT * FROM workout_plans 
-            WHERE user_id = :id AND CAST(start_date AS DATE) <= :today 
-            ORDER BY start_date DESC, created_at DESC 
-            LIMIT 1
-        ''')
-        
-        workout_plan = db.execute(query, {'id': session['user_id'], 'today': user_today}).fetchone()
-        workout_data = ensure_dict(workout_plan.plan_data) if workout_plan else None
-        current_day_number = 1
+    # Get user info and timezone
+    user = get_current_user(SQL_USER_PLAN_VIEW)
+    user_tz = user.timezone
+    user_today = get_user_current_date(user_tz)
+    
+    # Find the active workout plan
+    workout_plan = db.execute(SQL_ACTIVE_WORKOUT_PLAN, {'id': session['user_id'], 'today': user_today}).fetchone()
+    
+    # Unchanged plan on the same day: let the browser reuse its copy without parsing or rendering
+    etag = plan_page_etag(workout_plan, user_today) if workout_plan else None
+    if etag and plan_page_not_modified(etag):
+        return with_plan_page_etag(('', 304), etag)
+    
+    workout_data = None
+    current_day_number = 1
+    
+    if workout_plan:
+        start_date_obj = workout_plan.start_date
+        current_day_number = get_current_plan_day(start_date_obj, user_today)
         
-        if workout_plan:
-            start_date_obj = workout_plan.start_date
-            start_date_str = start_date_obj.strftime('%Y-%m-%d')
-            current_day_number = get_current_plan_day(start_date_str, user_tz)
-            
-            # Add formatted week range to workout data
-            workout_data['week_range'] = get_week_date_range(start_date_obj)
+        # Add formatted week range on a shallow copy; the parsed plan itself is shared
+        workout_data = {**get_plan_data('workout_plans', workout_plan, workout_plan.plan_data),
+                        'week_range': get_week_date_range(start_date_obj)}
 
-        return render_template('workout.html', 
-                                workout_plan=workout_data,
-                                current_day=current_day_number, # Pass the current day
-                                user_name=session.get('user_name'))
-    finally:
-        close_db()
+    rendered = render_template('workout.html', 
+                            workout_plan=workout_data,
+                            current_day=current_day_number, # Pass the current day
+                            user_name=session.get('user_name'))
+    return with_plan_page_etag(rendered, etag) if etag else rendered
 
 @app.route('/meals')
 def meals_page():
@@ -1425,47 +1763,36 @@ def meals_page():
         return redirect(url_for('index'))
     
     db = get_db()
-    try:
-        # Get user info and timezone
-        result = db.execute(text('SELECT * FROM users WHERE id = :id'), {'id': session['user_id']})
-        user = result.fetchone()
-        user_tz = dict(user._mapping).get('timezone', 'UTC')
-        user_today = get_user_current_date(user_tz)
-        
-        # Find the active meal plan
-        query = text('''
-            SELECT * FROM meal_plans 
-            WHERE user_id = :id AND CAST(start_date AS DATE) <= :today
-            ORDER BY start_date DESC, created_at DESC 
-            LIMIT 1
-        ''')
-        
-        meal_plan = db.execute(query, {'id': session['user_id'], 'today': user_today}).fetchone()
-        
-        if not meal_plan:
-            flash('No meal plan found. Please create a new plan.', 'info')
-            return redirect(url_for('profile_summary'))
-        
-        # Get the raw API data
-        raw_meal_data = meal_plan.plan_data
-        raw_meal_data = ensure_dict(raw_meal_data)
-        
-        # The start date object is needed for formatting
-        start_date_obj = meal_plan.start_date
-        start_date_str = start_date_obj.strftime('%Y-%m-%d')
+    # Get user info and timezone
+    user = get_current_user(SQL_USER_PLAN_VIEW)
+    user_tz = user.timezone
+    user_today = get_user_current_date(user_tz)
+    
+    # Find the active meal plan
+    meal_plan = db.execute(SQL_ACTIVE_MEAL_PLAN, {'id': session['user_id'], 'today': user_today}).fetchone()
+    
+    if not meal_plan:
+        flash('No meal plan found. Please create a new plan.', 'info')
+        return redirect(url_for('profile_summary'))
+    
+    # Unchanged plan on the same day: let the browser reuse its copy without formatting or rendering
+    etag = plan_page_etag(meal_plan, user_today)
+    if plan_page_not_modified(etag):
+        return with_plan_page_etag(('', 304), etag)
+    
+    # The start date object is needed for the current day
+    start_date_obj = meal_plan.start_date
 
-        # Format for display with actual dates based on rolling start_date
-        formatted_meal_data = transform_meal_plan_for_templates(raw_meal_data, start_date_obj)
-        
-        # Get current day number (1-7)
-        current_day_number = get_current_plan_day(start_date_str, user_tz)
-        
-        return render_template('meals.html',
-                                meal_plan=formatted_meal_data,
-                                current_day=current_day_number,
-                                user_name=session.get('user_name'))
-    finally:
-        close_db()
+    # Format for display with actual dates based on rolling start_date (cached per plan version)
+    formatted_meal_data = get_meal_plan_view(meal_plan)
+    
+    # Get current day number (1-7)
+    current_day_number = get_current_plan_day(start_date_obj, user_today)
+    
+    return with_plan_page_etag(render_template('meals.html',
+                            meal_plan=formatted_meal_data,
+                            current_day=current_day_number,
+                            user_name=session.get('user_name')), etag)
 
 @app.route('/recipe')
 def recipe_page():
@@ -1485,22 +1812,28 @@ def grocery_page():
         return redirect(url_for('index'))
     
     db = get_db()
-    try:
-        # Get latest grocery list
-        result = db.execute(text('SELECT * FROM grocery_lists WHERE user_id = :id ORDER BY created_at DESC LIMIT 1'), 
-                                {'id': session['user_id']})
-        grocery_list = result.fetchone()
-        
-        # ensure grocery data is a dict
-        grocery_data = ensure_dict(grocery_list.grocery_data) if grocery_list else None
-        
-        return render_template('grocery.html', 
-                                grocery_list=grocery_data,
-                                user_name=session.get('user_name'))
-    finally:
-        close_db()
+    # Get latest grocery list
+    result = db.execute(SQL_LATEST_GROCERY_LIST, 
+                            {'id': session['user_id']})
+    grocery_list = result.fetchone()
+    
+    # Unchanged list (checking an item bumps updated_at): let the browser reuse its copy
+    etag = plan_page_etag(grocery_list, None) if grocery_list else None
+    if etag and plan_page_not_modified(etag):
+        return with_plan_page_etag(('', 304), etag)
+    
+    # ensure grocery data is a dict (parsed once per list version)
+    grocery_data = get_plan_data('grocery_lists', grocery_list, grocery_list.grocery_data) if grocery_list else None
+    
+    rendered = render_template('grocery.html', 
+                            grocery_list=grocery_data,
+                            user_name=session.get('user_name'))
+    return with_plan_page_etag(rendered, etag) if etag else rendered
 
 # API endpoints for plan generation
+# Response envelope around the already-serialized plan; the closing brace is added per request
+_WORKOUT_PLAN_OK_PREFIX = '{"success":true,"message":"Workout plan generated successfully","plan":'
+
 @app.route('/api/generate-workout-plan', methods=['POST'])
 def generate_workout_plan():
     """Generate personalized workout plan using rule-based algorithm"""
@@ -1512,45 +1845,30 @@ def generate_workout_plan():
         user_id = session['user_id']
         
         # Generate workout plan
-        workout_generator = WorkoutGenerator(exercise_db='exercises.db', user_id = user_id)
-        workout_plan = workout_generator.generate_weekly_plan(user_id)
+        workout_plan = get_workout_generator().generate_weekly_plan(user_id)
         
         # Save to database
         start_date = workout_plan['week_of']
         
-        # Check if plan already exists for this week
-        result = db.execute(text('SELECT id FROM workout_plans WHERE user_id = :user_id AND start_date = :start_date'),
-                {'user_id': user_id, 'start_date': start_date})
-        existing = result.fetchone()
+        # Serialized once: the same JSON is stored and sent back as the response's plan
+        plan_json = app.json.dumps(workout_plan)
         
-        if existing:
-            # Update existing plan
-            db.execute(text('UPDATE workout_plans SET plan_data = :plan_data, created_at = CURRENT_TIMESTAMP WHERE id = :id'),
-                        {'plan_data': json.dumps(workout_plan,cls=DecimalEncoder), 'id': existing.id})
-        else:
-            # Insert new plan
-            db.execute(text('INSERT INTO workout_plans (user_id, start_date, plan_data) VALUES (:user_id, :start_date, :plan_data)'),
-                        {'user_id': user_id, 'start_date': start_date, 'plan_data': json.dumps(workout_plan,cls=DecimalEncoder)})
+        # Insert, or overwrite the plan already saved for this week
+        db.execute(SQL_ASYNC_COMMIT)
+        db.execute(SQL_UPSERT_WORKOUT_PLAN,
+                    {'user_id': user_id, 'start_date': start_date, 'plan_data': plan_json})
         
         db.commit()
         
-        return jsonify({
-            "success": True,
-            "message": "Workout plan generated successfully",
-            "plan": workout_plan
-        }), 200
+        return app.response_class(f'{_WORKOUT_PLAN_OK_PREFIX}{plan_json}}}', mimetype=app.json.mimetype)
         
     except ValueError as e:
         db.rollback()
         return jsonify({"error": str(e)}), 400
-    except Exception as e:
+    except Exception:
         db.rollback()
-        logger.error(f"Error generating workout plan: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error generating workout plan")
         return jsonify({"error": "Failed to generate workout plan"}), 500
-    finally:
-        close_db()
 
 @app.route('/api/generate-meal-plan', methods=['POST']) 
 def generate_meal_plan():
@@ -1560,28 +1878,17 @@ def generate_meal_plan():
     if 'user_id' not in session:
         return jsonify({"error": "Not authenticated"}), 401
     
-    db = get_db()
     try:
-        user_id = session['user_id']
-        
         # Get user data
-        result = db.execute(text('SELECT * FROM users WHERE id = :id'), {'id': user_id})
-        user = result.fetchone()
-        user_dict = dict(user._mapping)
+        user = get_current_user(SQL_USER_MEAL_GEN)
         
         # Get custom parameters from request if provided
         data = request.json or {}
-        target_calories = data.get('target_calories', user_dict['caloric_target'] or 2000)
+        target_calories = data.get('target_calories', user.caloric_target or 2000)
         num_days = data.get('num_days', 7)
         
         # Parse dietary restrictions
-        dietary = []
-        if user_dict['dietary_restrictions']:
-            try:
-                restrictions = json.loads(user_dict['dietary_restrictions'])
-                dietary = [r.strip().lower() for r in restrictions if r.strip()]
-            except (json.JSONDecodeError, TypeError):
-                dietary = []
+        dietary = list(parse_dietary_restrictions(user.dietary_restrictions))
         
         # Call API
         meal_plan = meal_api.generate_meal_plan(
@@ -1615,12 +1922,13 @@ def generate_meal_plan():
             "success": False,
             "error": "Internal server error"
         }), 500
-    finally:
-        close_db()
+
+# Fixed placeholder body, serialized once at import
+_GROCERY_LIST_WIP_BODY = orjson.dumps({"message": "Grocery list generation - Work in progress"})
 
 @app.route('/api/generate-grocery-list', methods=['POST'])
 def generate_grocery_list():
-    return jsonify({"message": "Grocery list generation - Work in progress"})
+    return app.response_class(_GROCERY_LIST_WIP_BODY, mimetype=app.json.mimetype)
 
 @app.route('/api/update-grocery-item', methods=['POST'])
 def update_grocery_item():
@@ -1643,7 +1951,7 @@ def update_grocery_item():
         
        # Get user nutrition data
             
-        result = db.execute(text('SELECT * FROM grocery_lists WHERE user_id = :id ORDER BY created_at DESC LIMIT 1'), 
+        result = db.execute(SQL_LATEST_GROCERY_LIST, 
                                 {'id':user_id})
         grocery_record = result.fetchone()
         
@@ -1673,13 +1981,9 @@ def update_grocery_item():
             return jsonify({"error": "Item not found"}), 404
         
         # Update database
-        db.execute(text('''
-            UPDATE grocery_lists 
-            SET grocery_data = :grocery_data 
-            WHERE id = :id
-        '''), {
+        db.execute(SQL_UPDATE_GROCERY_DATA, {
             'id': grocery_record.id,
-            'grocery_data': json.dumps(grocery_data, cls=DecimalEncoder)
+            'grocery_data': app.json.dumps(grocery_data)
         })
         db.commit()
         
@@ -1694,25 +1998,26 @@ def update_grocery_item():
         db.rollback()
         logger.error(f"Error updating grocery item: {e}")
         return jsonify({"error": "Failed to update item"}), 500
-    finally:
-        close_db()
+
+# Keep browsers from showing cached signed-in pages after logout; built once, appended per response
+_LOGOUT_HEADERS = Headers([
+    ('Cache-Control', 'no-cache, no-store, must-revalidate, post-check=0, pre-check=0, max-age=0'),
+    ('Pragma', 'no-cache'),
+    ('Expires', '0'),
+])
 
 @app.route('/logout')
 def logout():
     session.clear()
-    response = make_response(redirect(url_for('index')))
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate, post-check=0, pre-check=0, max-age=0'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-    
+    response = redirect(url_for('index'))
+    response.headers.extend(_LOGOUT_HEADERS)
     return response
 
 if __name__ == '__main__':
-    # Initialize database tables (creates tables if they don't exist)
-    init_db()
-    
+    # Tables were already created/updated when the module loaded
     port = int(os.environ.get('PORT', 5000))
-    debug_mode = os.environ.get('FLASK_DEBUG', '1') == '1'
+    # Development server only; production runs under gunicorn (see gunicorn.conf.py)
+    debug_mode = os.environ.get('FLASK_DEBUG', '0') == '1'
     app.run(host='0.0.0.0', port=port, debug=debug_mode)
 
 @app.route("/_probe/out")
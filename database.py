@@ -80,6 +80,12 @@ engine = create_engine(
     pool_size=10,
     max_overflow=20,
     pool_pre_ping=True,  # Verify connections before using
+    pool_recycle=1800,  # Replace pooled connections before server/LB idle timeouts drop them
+    # psycopg2 fast execution helpers: multi-row VALUES for INSERT executemany,
+    # execute_batch() for UPDATE/DELETE executemany
+    executemany_mode="values_plus_batch",
+    insertmanyvalues_page_size=1000,  # SQLAlchemy 2.0 name for executemany_values_page_size
+    executemany_batch_page_size=500,
     connect_args=connection_args,
     echo=False  # Set to True for SQL query logging
 )
@@ -92,8 +98,9 @@ Base = declarative_base()
 
 def get_db():
     """
-    Get database session
-    Usage in Flask routes:
+    Get the request's database session
+    The session is scoped per thread and released by the app's teardown_appcontext
+    handler, so routes never close it themselves:
         db = get_db()
         try:
             # Use db here
@@ -101,8 +108,6 @@ def get_db():
         except:
             db.rollback()
             raise
-        finally:
-            db.close()
     """
     return SessionLocal()
 
@@ -142,4 +142,20 @@ WHERE gl.user_id = u.id
 
 UPDATE users 
 SET timezone = 'America/Los_Angeles' 
-WHERE timezone = 'UTC';
\ No newline at end of file
+WHERE timezone = 'UTC';
+
+-- Composite indexes for the dashboard / plan page lookups.
+-- "Latest plan" reads filter on user_id and take the newest created_at;
+-- "active plan" reads walk start_date backwards from today, then created_at.
+-- CONCURRENTLY keeps the tables writable while the indexes build (run outside a transaction).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_workout_plans_user_created ON workout_plans (user_id, created_at DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_meal_plans_user_created ON meal_plans (user_id, created_at DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_grocery_lists_user_created ON grocery_lists (user_id, created_at DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_workout_plans_user_start_created ON workout_plans (user_id, start_date DESC, created_at DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_meal_plans_user_start_created ON meal_plans (user_id, start_date DESC, created_at DESC);
+
+-- Compress plan blobs with LZ4 instead of the default pglz (PostgreSQL 14+ built --with-lz4).
+-- Only affects values written from now on; the next upsert of a row recompresses it.
+ALTER TABLE workout_plans ALTER COLUMN plan_data SET COMPRESSION lz4;
+ALTER TABLE meal_plans ALTER COLUMN plan_data SET COMPRESSION lz4;
+ALTER TABLE grocery_lists ALTER COLUMN grocery_data SET COMPRESSION lz4;
@@ -58,6 +58,11 @@ DATABASE_SCHEMA = {
             "updated_at": "ALTER TABLE users ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP;",
             "privacy_accepted": "ALTER TABLE users ADD COLUMN IF NOT EXISTS privacy_accepted BOOLEAN DEFAULT FALSE;",
             "privacy_accepted_at": "ALTER TABLE users ADD COLUMN IF NOT EXISTS privacy_accepted_at TIMESTAMPTZ;",
+            # Share of the caloric target from each macro, kept in sync by Postgres (12+) on every UPDATE.
+            # Same arithmetic the dashboard used: grams rounded to 0.1, whole calories, truncated percent.
+            "protein_pct": "ALTER TABLE users ADD COLUMN IF NOT EXISTS protein_pct INTEGER GENERATED ALWAYS AS (CASE WHEN trunc(caloric_target) > 0 THEN trunc(round(COALESCE(protein_target_g, 0), 1) * 4 * 100 / trunc(caloric_target))::int ELSE 0 END) STORED;",
+            "carbs_pct": "ALTER TABLE users ADD COLUMN IF NOT EXISTS carbs_pct INTEGER GENERATED ALWAYS AS (CASE WHEN trunc(caloric_target) > 0 THEN trunc(round(COALESCE(carbs_target_g, 0), 1) * 4 * 100 / trunc(caloric_target))::int ELSE 0 END) STORED;",
+            "fat_pct": "ALTER TABLE users ADD COLUMN IF NOT EXISTS fat_pct INTEGER GENERATED ALWAYS AS (CASE WHEN trunc(caloric_target) > 0 THEN trunc(round(COALESCE(fat_target_g, 0), 1) * 9 * 100 / trunc(caloric_target))::int ELSE 0 END) STORED;",
         },
         "indexes": [
             "CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email ON users (email);",
@@ -84,6 +89,7 @@ DATABASE_SCHEMA = {
         },
         "indexes": [
             "CREATE UNIQUE INDEX IF NOT EXISTS idx_workout_plans_user_week ON workout_plans (user_id, week_date);",
+            "CREATE INDEX IF NOT EXISTS idx_workout_plans_user_created ON workout_plans (user_id, created_at DESC);",
         ],
     },
     "meal_plans": {
@@ -107,6 +113,7 @@ DATABASE_SCHEMA = {
         },
         "indexes": [
             "CREATE UNIQUE INDEX IF NOT EXISTS idx_meal_plans_user_week ON meal_plans (user_id, week_date);",
+            "CREATE INDEX IF NOT EXISTS idx_meal_plans_user_created ON meal_plans (user_id, created_at DESC);",
         ],
     },
     "grocery_lists": {
@@ -130,6 +137,7 @@ DATABASE_SCHEMA = {
         },
         "indexes": [
             "CREATE UNIQUE INDEX IF NOT EXISTS idx_grocery_lists_user_week ON grocery_lists (user_id, week_date);",
+            "CREATE INDEX IF NOT EXISTS idx_grocery_lists_user_created ON grocery_lists (user_id, created_at DESC);",
         ],
     },
 }
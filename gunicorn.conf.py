@@ -0,0 +1,34 @@
+"""
+gunicorn.conf.py: Production server settings, picked up automatically by `gunicorn app:app`.
+"""
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# Threaded workers: requests spend most of their time waiting on Postgres or the meal API,
+# so threads overlap that I/O while each process keeps its own connection pool and caches
+worker_class = "gthread"
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+# Plan creation waits on the meal API, which can take well over the 30s default
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+keepalive = 5
+
+accesslog = "-"
+errorlog = "-"
+
+# Import the app once in the master and fork workers from it, so they share its pages
+# copy-on-write and start without re-importing. Nothing opens threads or sockets at import.
+preload_app = True
+
+# The preloaded import happens before on_starting; leave the schema to that hook
+os.environ['FITPLAN_SCHEMA_READY'] = '1'
+
+
+def on_starting(server):
+    """Create/update the schema once in the master, before any worker is forked"""
+    from database import init_db, get_engine
+    init_db()
+    # Workers are forked from the master; don't let them inherit its pooled connection
+    get_engine().dispose()
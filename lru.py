@@ -0,0 +1,36 @@
+"""
+Thread-safe LRU cache behind the per-process plan caches and the workout generator's exercise pools
+"""
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry; safe to share between threads"""
+
+    def __init__(self, maxsize):
+        """
+        Args:
+            maxsize: Most entries kept; 0 disables the cache (get always misses)
+        """
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the value cached under key, marking it most recently used, or None on a miss"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        """Cache value under key, evicting the least recently used entry when full"""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
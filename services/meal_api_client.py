@@ -4,6 +4,7 @@ Handles communication with the meal planning microservice
 """
 import os
 import requests
+from requests.adapters import HTTPAdapter
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 import logging
@@ -11,6 +12,29 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+# Grocery section icons, keyed by the category names the grocery service returns
+GROCERY_CATEGORY_ICONS = {
+    'Pasta, Rice, and Cereals': '🌾',
+    'Vegetables': '🥬',
+    'Fruits': '🍎',
+    'Dairy': '🥛',
+    # 'Meat and Poultry': '🥩',
+    'Meat and Fish': '🥩',
+    'Meat Alternatives': '🌱',
+    # 'Fish and Seafood': '🐟',
+    'Herbs and Spices': '🌿',
+    'Bread and Baked Goods': '🍞',
+    # 'Condiments and Sauces': '🧂',
+    'Sauces and Condiments': '🧂',
+    'Cans and Jars': '🥫',
+    # 'Oils and Fats': '🫒',
+    'Drinks': '🥤',
+    'Frozen Foods': '🧊',
+    'Snacks': '🍪',
+    'Other': '📦'
+}
+
+
 class MealPlanningAPIError(Exception):
     """Custom exception for meal planning API errors"""
     pass
@@ -25,6 +49,13 @@ class MealPlanningAPI:
             'https://cqztaifwfa.us-east-1.awsapprunner.com/' # production API as backup
         )
         self.timeout = 90  # API developer specified 30 seconds
+        
+        # Keep-alive session so the status poll and plan calls reuse pooled connections
+        # instead of paying a TCP + TLS handshake on every request
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=10)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
     
     def generate_meal_plan(
         self,
@@ -92,7 +123,7 @@ class MealPlanningAPI:
             logger.info(f"Calling meal planning API: {url}")
             logger.info(f"Request payload: {payload}")
             
-            response = requests.post(
+            response = self.session.post(
                 url,
                 json=payload,
                 headers=headers,
@@ -155,7 +186,7 @@ class MealPlanningAPI:
         try:
             # Try a simple GET to the base URL or health endpoint
             status_url = f"{self.base_url.rstrip('/')}/status"
-            response = requests.get(status_url, timeout=5)
+            response = self.session.get(status_url, timeout=5)
             return response.status_code in [200, 404]  # 404 is ok, means server is up
         except:
             return False
@@ -206,16 +237,17 @@ class MealPlanningAPI:
         
         return meal_descriptions
     
-    def _transform_tagged_meal_plan_to_grocery_format(self, meal_plan: Dict) -> List[List[dict]]:
+    def _transform_tagged_meal_plan_to_grocery_format(self, meal_plan: Dict) -> List[dict]:
         """
         Transform meal plan into grocery list API format.
-        Each meal becomes one array of ingredient descriptions.
+        Every meal's merge ingredients are tagged with their recipe and raw unit/ingredient
+        text in a single pass and appended straight onto one flat list.
         
         Args:
             meal_plan: Raw meal plan with daily_plans structure
             
         Returns:
-            list: List of meal merge ingredients (each meal = array of ingredient dicts)
+            list: Flat list of merge ingredient dicts across all meals
         """
         merge_ingredients = []
         
@@ -229,44 +261,43 @@ class MealPlanningAPI:
                     logging.warning("Null meal encountered in meal plan")
                     continue
                 meal_merge_ingredients = meal.get('merge_ingredients', [])
-                # print(meal)
-                raw_units = meal.get('units', [])
-                raw_ingredients = meal.get('ingredients', [])
-                for ingredient in meal_merge_ingredients:
-                    ingredient['r'] = None
-                    ingredient['recipe_id'] = meal.get('recipe_id', None)
-                    ingredient['title'] = meal.get('title', None)
-                    ingredient['data_source'] = meal.get('data_source', None)
-                if len(raw_units):
-                    raw_units = [u.lower().strip() if u else None for u in raw_units]
-                    for r,ingredient in zip(raw_units, meal_merge_ingredients):
-                        ingredient['r'] = r
-                if len(raw_ingredients):
-                    for ri,ingredient in zip(raw_ingredients, meal_merge_ingredients):
-                        ingredient['ri'] = ri
-
-                # logging.info(f"Meal merge ingredients: {merge_ingredients}")
-                # Loop through units and fill in with 0 if missing
-                for ingredient in meal_merge_ingredients:
-                    if 'q' not in ingredient or ingredient['q'] is None:
+                if not meal_merge_ingredients:
+                    continue
+                
+                recipe_id = meal.get('recipe_id', None)
+                title = meal.get('title', None)
+                data_source = meal.get('data_source', None)
+                raw_units = meal.get('units') or []
+                raw_ingredients = meal.get('ingredients') or []
+                num_units = len(raw_units)
+                num_raw_ingredients = len(raw_ingredients)
+                
+                for i, ingredient in enumerate(meal_merge_ingredients):
+                    ingredient['recipe_id'] = recipe_id
+                    ingredient['title'] = title
+                    ingredient['data_source'] = data_source
+                    raw_unit = raw_units[i] if i < num_units else None
+                    ingredient['r'] = raw_unit.lower().strip() if raw_unit else None
+                    if i < num_raw_ingredients:
+                        ingredient['ri'] = raw_ingredients[i]
+                    
+                    # Fill in defaults for anything the tagger left out
+                    if ingredient.get('q') is None:
                         logger.warning(f"Missing quantity in ingredient: {ingredient}")
                         ingredient['q'] = 0
-                    if 'u' not in ingredient or ingredient['u'] is None:
+                    if ingredient.get('u') is None:
                         logger.warning(f"Missing unit in ingredient: {ingredient}")
                         ingredient['u'] = 'units'
-                    if 'f' not in ingredient or ingredient['f'] is None:
+                    if ingredient.get('f') is None:
                         logger.warning(f"Missing unit family in ingredient: {ingredient}")
                         ingredient['f'] = 'count'
-                    if 'm' not in ingredient or ingredient['m'] is None:
+                    if ingredient.get('m') is None:
                         logger.warning(f"Missing merge ingredient in ingredient: {ingredient}")
                         ingredient['m'] = ingredient['n']  # use name as merge key if missing
                 
-                if meal_merge_ingredients:
-                    merge_ingredients.append(meal_merge_ingredients)
-        # logging.info(f"mege_ingredients: {merge_ingredients}")
-        # Flatten the list of lists into a single list
-        flat_merge_ingredients = [item for sublist in merge_ingredients for item in sublist]
-        return flat_merge_ingredients
+                merge_ingredients.extend(meal_merge_ingredients)
+        # logging.info(f"merge_ingredients: {merge_ingredients}")
+        return merge_ingredients
     
     def generate_grocery_list(
         self,
@@ -326,7 +357,7 @@ class MealPlanningAPI:
             logger.info(f"Calling grocery list API: {url}")
             logger.info(f"Request payload with {len(meal_descriptions)} meals")
             
-            response = requests.post(
+            response = self.session.post(
                 url,
                 json=payload,
                 headers=headers,
@@ -438,7 +469,7 @@ class MealPlanningAPI:
             logger.info(f"Calling grocery list API: {url}")
             logger.info(f"Request payload with {len(merge_ingredients)} items")
             
-            response = requests.post(
+            response = self.session.post(
                 url,
                 json=payload,
                 headers=headers,
@@ -512,17 +543,11 @@ class MealPlanningAPI:
             logger.warning("Empty shopping list from API")
             return {}
         
-        # Add checked status to each item
-        for item in shopping_list:
-            item['checked'] = False
-        
-        # Organize by category
+        # Add checked status and organize by category in one pass
         categories = {}
         for item in shopping_list:
-            category = item.get('category', 'Other')
-            if category not in categories:
-                categories[category] = []
-            categories[category].append(item)
+            item['checked'] = False
+            categories.setdefault(item.get('category', 'Other'), []).append(item)
         
         # Calculate week range
         sunday = week_monday + timedelta(days=6)
@@ -531,28 +556,6 @@ class MealPlanningAPI:
         else:
             week_str = f"{week_monday.strftime('%b %d')} to {sunday.strftime('%b %d')}"
         
-        # Map categories to emoji icons
-        category_icons = {
-            'Pasta, Rice, and Cereals': '🌾',
-            'Vegetables': '🥬',
-            'Fruits': '🍎',
-            'Dairy': '🥛',
-            # 'Meat and Poultry': '🥩',
-            'Meat and Fish': '🥩',
-            'Meat Alternatives': '🌱',
-            # 'Fish and Seafood': '🐟',
-            'Herbs and Spices': '🌿',
-            'Bread and Baked Goods': '🍞',
-            # 'Condiments and Sauces': '🧂',
-            'Sauces and Condiments': '🧂',
-            'Cans and Jars': '🥫',
-            # 'Oils and Fats': '🫒',
-            'Drinks': '🥤',
-            'Frozen Foods': '🧊',
-            'Snacks': '🍪',
-            'Other': '📦'
-        }
-        
         # Build final structure
         grocery_data = {
             'week': week_str,
@@ -560,11 +563,11 @@ class MealPlanningAPI:
         }
         
         # Sort categories and build sections
-        for category in sorted(categories.keys()):
-            icon = category_icons.get(category, '📦')
+        for category, items in sorted(categories.items()):
+            icon = GROCERY_CATEGORY_ICONS.get(category, '📦')
             grocery_data['sections'].append({
                 'title': f"{icon} {category}",
-                'items': categories[category]
+                'items': items
             })
         
         logger.info(f"Formatted grocery list with {len(shopping_list)} items in {len(categories)} categories")
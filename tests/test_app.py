@@ -0,0 +1,40 @@
+"""Regression tests for app.py: session handling and password hashing."""
+import hashlib
+import os
+
+# Skip the import-time schema DDL; these tests never touch the database
+os.environ.setdefault('FITPLAN_SCHEMA_READY', '1')
+
+from app import app, hash_password, verify_password
+
+
+def test_flashed_message_renders_after_redirect():
+    """Flashes are stored as tuples, which only survive the session cookie if loads untags them"""
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_flashes'] = [('info', 'Your personalized plans have been created!')]
+
+    response = client.get('/')
+
+    assert response.status_code == 200
+    assert b'Your personalized plans have been created!' in response.data
+
+
+def test_password_round_trip():
+    stored = hash_password('correct horse')
+
+    assert stored.startswith('scrypt$')
+    assert verify_password('correct horse', stored) == (True, False)
+
+
+def test_wrong_password_is_rejected():
+    stored = hash_password('correct horse')
+
+    assert verify_password('battery staple', stored) == (False, False)
+
+
+def test_legacy_sha256_digest_verifies_and_needs_rehash():
+    stored = hashlib.sha256(b'correct horse').hexdigest()
+
+    assert verify_password('correct horse', stored) == (True, True)
+    assert verify_password('battery staple', stored) == (False, False)
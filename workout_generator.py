@@ -6,47 +6,42 @@ UPDATED: PostgreSQL for user data (fitplan_db), SQLite for exercise database
 
 import sqlite3
 import json
+import orjson
 import os
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Set, Tuple, Optional
 import random
 import logging
-from sqlalchemy import create_engine, text
+import threading
+from sqlalchemy import text
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 from decimal import Decimal
-from urllib.parse import quote_plus, urlencode, urlparse, urlunparse, parse_qsl
 from database import get_db, close_db, init_db, get_engine
+from lru import LRUCache
 
 # Load environment variables
 load_dotenv()
-db_host = 'postgres'
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def get_db_creds():
-    # Local path: one JSON env var
-    js = os.getenv("DATABASE_SECRET_JSON")
-    if js:
-        return json.loads(js)
+# Built once at import instead of on every get_user_profile() call; only the columns
+# the generator reads, so unrelated profile text is not fetched
+SQL_USER_BY_ID = text(
+    'SELECT id, age, gender, weight, fitness_goals, activity_level, workout_schedule, '
+    'physical_limitations, available_equipment, tdee, bmr FROM users WHERE id = :id'
+)
 
-    # AWS path: fetch secret by ARN
-    arn = os.getenv("DATABASE_SECRET_ARN")
-    if arn:
-        return json.loads(arn)
+# Distinct (level, equipment, limitations) combinations whose filtered exercise lists are kept
+EXERCISE_POOL_CACHE_SIZE = int(os.environ.get('EXERCISE_POOL_CACHE_SIZE', 512))
 
-    # Fallback: read split vars (useful for quick tests)
-    return {
-        "username": os.getenv("POSTGRES_USER", "fitplan_user"),
-        "password": os.getenv("POSTGRES_PASSWORD", "fitplan_pass"),
-        "host": os.getenv("POSTGRES_HOST", db_host),
-        "port": int(os.getenv("POSTGRES_PORT", "5432")),
-        "dbname": os.getenv("POSTGRES_DB", "fitplan_db"),
-    }
-
-def add_params(url, **extra):
-    u = urlparse(url); q = dict(parse_qsl(u.query)); q.update(extra)
-    return urlunparse(u._replace(query=urlencode(q)))
+# Applied to every exercise database connection; query_only guards the read-only catalog
+EXERCISE_DB_PRAGMAS = """
+    PRAGMA query_only = ON;
+    PRAGMA temp_store = MEMORY;
+    PRAGMA cache_size = -20000;
+    PRAGMA mmap_size = 268435456;
+"""
 
 class WorkoutGenerator:
     def __init__(self, exercise_db='exercises.db'):
@@ -55,54 +50,22 @@ class WorkoutGenerator:
         
         Args:
             exercise_db: Path to SQLite exercise database (stays SQLite)
-            database_url: PostgreSQL URL for user data (optional, reads from env if None)
         """
         self.exercise_db = exercise_db
+        # One SQLite connection per thread, opened on first use and kept for the process
+        self._local = threading.local()
+        self._exercise_pool_cache = LRUCache(EXERCISE_POOL_CACHE_SIZE)
         
-        # # PostgreSQL connection for user data
-        creds = get_db_creds()
-
-        # creds from your existing get_db_creds()
-        user = quote_plus(creds["username"])       # quote in case of special chars
-        pwd  = quote_plus(creds["password"])
-        host = creds["host"]; port = creds["port"]; db = creds["dbname"]
-
-        base_url = f"postgresql+psycopg2://{user}:{pwd}@{host}:{port}/{db}"
-
-        # Decide whether to require SSL
-        # - If DATABASE_SECRET_ARN is present, assume production and require SSL
-        # - OR if explicitly forced via FORCE_LOCAL_SSL=true (useful when you do local TLS)
-        force_ssl = bool(os.getenv("DATABASE_SECRET_ARN")) or os.getenv("FORCE_LOCAL_SSL", "false").lower() in ("1", "true", "yes")
-
-        if force_ssl:
-            conn_str = add_params(base_url, sslmode="require")
-            connection_args = {"sslmode": "require"}
-        else:
-            conn_str = base_url
-            connection_args = {}
-        connection_args["connect_timeout"] = 5  # fail fast while testing # TODO: extend this for production
-
-        # Create engine
-        engine = create_engine(
-            conn_str,
-            pool_size=10,
-            max_overflow=20,
-            pool_pre_ping=True,  # Verify connections before using
-            connect_args=connection_args,
-            echo=False  # Set to True for SQL query logging
-        )
-        self.engine = engine
-
+        # PostgreSQL user data goes through the app's engine, so profile reads share its
+        # connection pool instead of holding a second pool per process
+        self.engine = get_engine()
         self.SessionLocal = sessionmaker(bind=self.engine)
         
     def get_user_profile(self, user_id: int) -> Dict:
         """Fetch user profile from PostgreSQL including workout_schedule preference"""
         session = self.SessionLocal()
         try:
-            result = session.execute(
-                text('SELECT * FROM users WHERE id = :id'),
-                {'id': user_id}
-            )
+            result = session.execute(SQL_USER_BY_ID, {'id': user_id})
             user = result.fetchone()
             
             if not user:
@@ -124,14 +87,25 @@ class WorkoutGenerator:
                 'fitness_goal': user_dict['fitness_goals'],
                 'activity_level': user_dict['activity_level'],
                 'workout_schedule': user_dict['workout_schedule'],
-                'physical_limitations': json.loads(user_dict['physical_limitations']) if user_dict['physical_limitations'] else [],
-                'available_equipment': json.loads(user_dict['available_equipment']) if user_dict['available_equipment'] else [],
+                'physical_limitations': orjson.loads(user_dict['physical_limitations']) if user_dict['physical_limitations'] else [],
+                'available_equipment': orjson.loads(user_dict['available_equipment']) if user_dict['available_equipment'] else [],
                 'tdee': user_dict['tdee'],
                 'bmr': user_dict['bmr']
             }
         finally:
             session.close()
     
+    def get_exercise_connection(self) -> sqlite3.Connection:
+        """Return this thread's connection to the exercise database, opening it on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.exercise_db)
+            conn.row_factory = sqlite3.Row
+            # The exercise catalog is only ever read: keep pages in cache/mmap, sort in memory
+            conn.executescript(EXERCISE_DB_PRAGMAS)
+            self._local.conn = conn
+        return conn
+    
     def determine_fitness_level(self, activity_level: str, age: int) -> str:
         """Determine fitness level from activity level and age"""
         level_map = {
@@ -420,8 +394,7 @@ class WorkoutGenerator:
                 'categories': []
             }
         
-        conn = sqlite3.connect(self.exercise_db)
-        conn.row_factory = sqlite3.Row
+        conn = self.get_exercise_connection()
         
         # Get exercises with contraindications in selected categories
         placeholders = ','.join('?' * len(physical_limitations))
@@ -437,17 +410,18 @@ class WorkoutGenerator:
         contraindicated = conn.execute(contraindicated_query, physical_limitations).fetchall()
         contraindicated_ids = [row['exercise_id'] for row in contraindicated]
         
-        # Find which of these have modifications in the same categories
+        # Find which of these have modifications in the same categories. Formatted once, so every
+        # lookup below sends identical SQL text and reuses sqlite3's cached prepared statement
+        mod_query = f'''
+            SELECT em.modification_text, mc.category_name
+            FROM exercise_modifications em
+            JOIN modification_categories mc ON em.category_id = mc.category_id
+            WHERE em.exercise_id = ?
+                AND mc.category_name IN ({placeholders})
+                AND mc.category_type = 'contraindication'
+        '''
         modified_exercises = {}
         for exercise_id in contraindicated_ids:
-            mod_query = f'''
-                SELECT em.modification_text, mc.category_name
-                FROM exercise_modifications em
-                JOIN modification_categories mc ON em.category_id = mc.category_id
-                WHERE em.exercise_id = ?
-                    AND mc.category_name IN ({placeholders})
-                    AND mc.category_type = 'contraindication'
-            '''
             mods = conn.execute(mod_query, [exercise_id] + physical_limitations).fetchall()
             
             if mods:
@@ -460,8 +434,6 @@ class WorkoutGenerator:
         # Exercises to exclude (have contraindications but NO modifications)
         excluded = [ex_id for ex_id in contraindicated_ids if ex_id not in modified_exercises]
         
-        conn.close()
-        
         return {
             'excluded_exercises': excluded,
             'modified_exercises': modified_exercises,
@@ -495,8 +467,7 @@ class WorkoutGenerator:
                               contraindication_info: Dict) -> List[Dict]:
         """Get all exercises with contraindication priority"""
         
-        conn = sqlite3.connect(self.exercise_db)
-        conn.row_factory = sqlite3.Row
+        conn = self.get_exercise_connection()
         
         excluded_ids = contraindication_info['excluded_exercises']
         equipment_list = self.filter_exercises_by_equipment(user_profile['available_equipment'])
@@ -548,11 +519,13 @@ class WorkoutGenerator:
             params += excluded_ids
         
         exercises = conn.execute(query, params).fetchall()
-        conn.close()
         
         result = []
         for ex in exercises:
             ex_dict = dict(ex)
+            # Split once here; pools are cached, so day selection and scoring reuse these
+            ex_dict['primary_muscle_list'] = ex_dict['primary_muscles'].split(',') if ex_dict['primary_muscles'] else []
+            ex_dict['primary_muscle_names'] = frozenset(m.strip() for m in ex_dict['primary_muscle_list'])
             # Add contraindication priority flag
             if ex_dict['id'] in contraindication_info['modified_exercises']:
                 ex_dict['contraindication_status'] = 'modified'
@@ -564,9 +537,27 @@ class WorkoutGenerator:
         
         return result
     
-    def score_exercise(self, exercise: Dict, target_muscles: List[str], 
-                       fitness_goal: str, already_selected: List[str]) -> float:
-        """Score exercise with contraindication priority"""
+    def get_exercise_pool(self, user_profile: Dict, fitness_level: str) -> List[Dict]:
+        """
+        Contraindication-filtered eligible exercises for a profile, memoized per generator
+        
+        Scoring adds randomness, so whole plans are never cached; the catalog lookups are
+        deterministic, read-only and depend only on level, equipment and limitations, which
+        many users share. The returned list is shared; treat it as read-only.
+        """
+        key = (fitness_level,
+               tuple(sorted(user_profile['available_equipment'])),
+               tuple(sorted(user_profile['physical_limitations'])))
+        pool = self._exercise_pool_cache.get(key)
+        if pool is None:
+            contraindication_info = self.get_contraindication_info(user_profile['physical_limitations'])
+            pool = self.get_eligible_exercises(user_profile, fitness_level, contraindication_info)
+            self._exercise_pool_cache.put(key, pool)
+        return pool
+    
+    def score_exercise(self, exercise: Dict, target_muscles: Set[str], 
+                       fitness_goal: str, already_selected: Set[str]) -> float:
+        """Score exercise with contraindication priority; callers build both sets once per day"""
         score = 100.0
         
         # PRIORITY: Contraindication status
@@ -575,10 +566,8 @@ class WorkoutGenerator:
         elif exercise['contraindication_status'] == 'modified':
             score += 25  # Second priority
         
-        primary_muscles = exercise['primary_muscles'].split(',') if exercise['primary_muscles'] else []
-        
         # Muscle group match
-        muscle_match = len(set(primary_muscles) & set(target_muscles))
+        muscle_match = len(target_muscles.intersection(exercise['primary_muscle_list']))
         score += muscle_match * 25
         
         # Compound movement bonus
@@ -612,7 +601,7 @@ class WorkoutGenerator:
     def select_exercises_for_day(self, eligible_exercises: List[Dict], 
                                  day_info: Dict, fitness_level: str, 
                                  fitness_goal: str, target_count: int,
-                                 already_selected: List[str]) -> Tuple[List[Dict], List[str]]:
+                                 already_selected: Set[str]) -> Tuple[List[Dict], List[str]]:
         """
         Select exercises for a day and return warnings for missing muscle groups
         Returns: (selected_exercises, warnings)
@@ -621,15 +610,16 @@ class WorkoutGenerator:
             return [], []
         
         target_muscles = day_info['muscle_groups']
+        # Membership set shared by the filter and every score_exercise call below
+        target_set = set(target_muscles)
         warnings = []
         
         # Check if we have exercises for each target muscle
         available_muscles = set()
         for ex in eligible_exercises:
-            primary = ex['primary_muscles'].split(',') if ex['primary_muscles'] else []
-            available_muscles.update([m.strip() for m in primary])
+            available_muscles.update(ex['primary_muscle_names'])
         
-        missing_muscles = set(target_muscles) - available_muscles
+        missing_muscles = target_set - available_muscles
         if missing_muscles:
             for muscle in missing_muscles:
                 warnings.append(
@@ -638,11 +628,8 @@ class WorkoutGenerator:
                 )
         
         # Filter exercises for this day
-        relevant_exercises = []
-        for ex in eligible_exercises:
-            primary = ex['primary_muscles'].split(',') if ex['primary_muscles'] else []
-            if any(muscle.strip() in target_muscles for muscle in primary):
-                relevant_exercises.append(ex)
+        relevant_exercises = [ex for ex in eligible_exercises
+                              if not target_set.isdisjoint(ex['primary_muscle_names'])]
         
         if not relevant_exercises:
             return [], warnings
@@ -667,11 +654,11 @@ class WorkoutGenerator:
         
         # Score and sort
         compound_exercises.sort(
-            key=lambda x: self.score_exercise(x, target_muscles, fitness_goal, already_selected), 
+            key=lambda x: self.score_exercise(x, target_set, fitness_goal, already_selected), 
             reverse=True
         )
         isolation_exercises.sort(
-            key=lambda x: self.score_exercise(x, target_muscles, fitness_goal, already_selected), 
+            key=lambda x: self.score_exercise(x, target_set, fitness_goal, already_selected), 
             reverse=True
         )
         
@@ -682,10 +669,11 @@ class WorkoutGenerator:
         
         # Fill remaining slots
         if len(selected) < target_count:
+            selected_ids = {s['id'] for s in selected}
             remaining = [ex for ex in relevant_exercises 
-                        if ex['id'] not in [s['id'] for s in selected]]
+                        if ex['id'] not in selected_ids]
             remaining.sort(
-                key=lambda x: self.score_exercise(x, target_muscles, fitness_goal, already_selected),
+                key=lambda x: self.score_exercise(x, target_set, fitness_goal, already_selected),
                 reverse=True
             )
             selected.extend(remaining[:target_count - len(selected)])
@@ -742,11 +730,8 @@ class WorkoutGenerator:
         volume_config = self.calculate_daily_volume(workout_days, user_profile['fitness_goal'], fitness_level)
         split = self.get_workout_split(workout_days, fitness_level, user_profile['fitness_goal'])
         
-        # NEW: Get contraindication info
-        contraindication_info = self.get_contraindication_info(user_profile['physical_limitations'])
-        
-        # Get eligible exercises with contraindication filtering
-        eligible_exercises = self.get_eligible_exercises(user_profile, fitness_level, contraindication_info)
+        # Get eligible exercises with contraindication filtering (cached per profile combination)
+        eligible_exercises = self.get_exercise_pool(user_profile, fitness_level)
         
         if not eligible_exercises:
             raise ValueError("No eligible exercises found with current filters")
@@ -769,7 +754,7 @@ class WorkoutGenerator:
             'days': []
         }
         
-        already_selected = []
+        already_selected = set()
         
         for day_info in split:
             if day_info.get('type') == 'recovery':
@@ -813,10 +798,10 @@ class WorkoutGenerator:
                     'rest_seconds': programming['rest_seconds'],
                     'estimated_time_min': round(time, 1),
                     'estimated_calories': round(calories, 1),
-                    'instructions': json.loads(exercise['instructions']) if exercise['instructions'] else [],
-                    'primary_muscles': exercise['primary_muscles'].split(',') if exercise['primary_muscles'] else [],
+                    'instructions': orjson.loads(exercise['instructions']) if exercise['instructions'] else [],
+                    'primary_muscles': list(exercise['primary_muscle_list']),
                     'equipment': exercise['equipment'],
-                    'images': json.loads(exercise['images']) if exercise['images'] else []
+                    'images': orjson.loads(exercise['images']) if exercise['images'] else []
                 }
                 
                 # NEW: Add modifications if present
@@ -829,7 +814,7 @@ class WorkoutGenerator:
                 day_exercises.append(ex_data)
                 day_calories += calories
                 day_duration += time
-                already_selected.append(exercise['id'])
+                already_selected.add(exercise['id'])
             
             day_data = {
                 'day': day_info['day'],